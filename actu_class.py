@@ -14,7 +14,8 @@ import numpy as np
 import requests
 from termcolor import colored
 from tqdm import tqdm
-from bs4 import BeautifulSoup
+import copy
+import lxml.html
 import urllib
 from urllib.parse import urlparse
 from urllib.parse import quote
@@ -27,8 +28,29 @@ from slugify import slugify
 from pathlib import Path
 import random
 import string
+import asyncio
+import collections
+import hashlib
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from matcher_utils import MatcherClass
 from py_analytics import PyAnalyticsClass
+from session_utils import SessionManagerClass
+from http_cache import HttpCacheClass
+from circuit_breaker import CircuitBreakerClass
+from latency_tracker import LatencyTrackerClass
+from crawl_journal import CrawlJournalClass
+from response_archive import ResponseArchiveClass, ArchiveMissError
+from selector_plan import SelectorPlanClass
+from boilerplate_utils import BoilerplateClass
+from date_utils import DateNormalizerClass
+from charset_utils import CharsetCacheClass
+from url_index import ProcessedUrlIndexClass
+from state_store import StateStoreClass
+from fingerprint_index import FingerprintIndexClass
+from history_log import HistoryLogClass
+from parquet_utils import PostsParquetClass
 from urllib.parse import urlencode
 
 from requests.packages.urllib3.exceptions import InsecureRequestWarning
@@ -51,6 +73,7 @@ class ActuClass:
         db_storage_csv: str = '',
         db_storage_image: str = '',
         should_save_image: bool = True,
+        should_save_parquet: bool = False, # also write posts-*.parquet next to posts-*.csv (requires pyarrow)
         should_use_same_session: bool = False,
         # keep_html: bool = False, # should remove html tags from text?
         test_model = False,
@@ -58,6 +81,43 @@ class ActuClass:
         debug_info = False, # should display processing information
         is_deep_scan_mode = True, # should scan all pages
         default_pagination_limit = 3, # pagination limit if is_deep_scan_mode = false
+        early_stop_pages = 0, # stop a batch after N listing pages already processed in a row (0: never)
+        prefetch_pages = 0, # fetch the next N listing pages concurrently (0 / 1: one by one)
+
+        # concurrency params
+        use_async_engine: bool = False, # fetch listing/detail pages concurrently (asyncio)
+        max_concurrency: int = 8, # max simultaneous requests (all hosts)
+        max_concurrency_per_host: int = 2, # max simultaneous requests per host
+        links_queue_size: int = 100, # max links waiting for detail extraction
+
+        # http params
+        http_pool_size: int = 10, # kept-alive connections per host
+        http_retries: int = 3, # retries on 429 / 5xx (connection errors and timeouts are not retried)
+        http_backoff_factor: float = 0.5, # sleep between retries (exponential)
+        enable_http_cache: bool = False, # revalidate listing pages (ETag / Last-Modified)
+        http_cache_dir: str = '', # defaults to config_dir + '/http_cache/'
+        http_cache_max_mb: float = 200,
+        circuit_breaker_threshold: int = 5, # fail fast on a host after N request errors (timeouts, connection errors...) in a row (0: never)
+        circuit_breaker_reset: float = 120, # seconds before trying an open host again
+        adaptive_timeouts: bool = False, # tune timeouts per host from observed latencies (else 30s)
+        latency_histograms_json: str = '', # defaults to config_dir + '/latency_histograms.json'
+
+        # crash safety params
+        enable_journal: bool = False, # write pages / posts to a journal as soon as they are extracted
+        journal_dir: str = '', # defaults to config_dir + '/journal/'
+        resume: bool = False, # replay the journal of a previous (crashed) run
+
+        # response archive params
+        archive_mode: str = '', # 'record' listing / detail responses, 'replay' them without network ('' = off)
+        archive_dir: str = '', # defaults to config_dir + '/archive/'
+
+        # crawl state params
+        state_db: str = '', # sqlite file holding the processed urls instead of the processed_*.csv files ('' = off)
+        url_index_file: str = '', # memory-mapped fingerprints of processed_posts_urls.csv, looked up instead of loading it ('' = off)
+        history_compaction_ratio: float = 0.5, # duplicate rows / rows of a loaded processed_*.csv above which it is compacted on save (0 = off)
+
+        # content cleaning params
+        boilerplate_rules_csv: str = '', # extra boilerplate rules, defaults to config_dir + '/boilerplate_rules.csv'
 
         # analytic params
         enable_analytics: bool = False,
@@ -86,6 +146,8 @@ class ActuClass:
 
         self._should_use_same_session = should_use_same_session
         self._should_save_image = should_save_image
+        self._should_save_parquet = should_save_parquet
+        self._parquet = PostsParquetClass()
         self._test_model = test_model
         self._db_storage_csv = db_storage_csv
         self._db_storage_image = db_storage_image
@@ -97,6 +159,13 @@ class ActuClass:
         self._debug_info = debug_info
         self._is_deep_scan_mode = is_deep_scan_mode
         self._default_pagination = default_pagination_limit
+        self._early_stop_pages = early_stop_pages
+        self._prefetch_pages = max(0, int(prefetch_pages))
+        self._early_stops = {}
+        self._use_async_engine = use_async_engine
+        self._max_concurrency = max(1, int(max_concurrency))
+        self._max_concurrency_per_host = max(1, int(max_concurrency_per_host))
+        self._links_queue_size = max(1, int(links_queue_size))
 
         '''
         # Load config and history
@@ -109,36 +178,108 @@ class ActuClass:
         # exit()
         self._post_models_header = self._post_models.head()
 
-        all_publications_urls = self.load_csv(db_already_processed_publications_csv, ',')
-        # Flatten the array
-        self._all_publications_urls = [item for sublist in all_publications_urls for item in sublist]
+        # compile every model's selectors now: an invalid selector fails here, not mid-crawl
+        self._selector_plans = {}
+        for model in self.get_models():
+            self.get_selector_plan(model)
 
-        all_post_urls = self.load_csv(db_already_processed_posts_csv, ',')
-        # Flatten the array
-        self._all_post_urls = [item for sublist in all_post_urls for item in sublist]
+        # processed_*.csv files: only the urls of the run are appended
+        self._history = {
+            'posts': HistoryLogClass(csv_file=db_already_processed_posts_csv, canonical=ProcessedUrlIndexClass().canonical, compaction_ratio=history_compaction_ratio),
+            'images': HistoryLogClass(csv_file=db_already_processed_images_csv, compaction_ratio=history_compaction_ratio),
+            'publications': HistoryLogClass(csv_file=db_already_processed_publications_csv, compaction_ratio=history_compaction_ratio),
+        }
 
-        all_image_urls = self.load_csv(db_already_processed_images_csv, ',')
-        # Flatten the array
-        self._all_image_urls = [item for sublist in all_image_urls for item in sublist]
+        self._state_db = state_db
+        self._state = StateStoreClass(db_path=state_db) if state_db else None
+        if self._state:
+            # history is looked up in the state store, not loaded (the csv files are imported on first use)
+            self._state.import_csv('posts', db_already_processed_posts_csv, ProcessedUrlIndexClass().canonical)
+            self._state.import_csv('images', db_already_processed_images_csv)
+            self._state.import_csv('publications', db_already_processed_publications_csv)
+            self._all_publications_urls = []
+            # replay re-extracts every archived post
+            self._all_post_urls = ProcessedUrlIndexClass(store=self._state if archive_mode != 'replay' else None, table='posts')
+            self._all_image_urls = []
+        else:
+            # publication urls of the run (the history is never loaded: compacted by --compact-history only)
+            self._all_publications_urls = []
+
+        self._url_index = FingerprintIndexClass(index_file=url_index_file) if url_index_file and not self._state else None
+        if self._url_index is not None:
+            if self._url_index.is_stale(db_already_processed_posts_csv):
+                print('Rebuilding the url index of ' + db_already_processed_posts_csv + '...')
+                self._url_index.build_from_csv(db_already_processed_posts_csv, ProcessedUrlIndexClass().canonical)
+            # replay re-extracts every archived post
+            self._all_post_urls = ProcessedUrlIndexClass(fingerprints=self._url_index if archive_mode != 'replay' else None)
+            # image urls are only saved, never looked up
+            self._all_image_urls = []
+        elif not self._state:
+            # replay re-extracts every archived post
+            self._all_post_urls = ProcessedUrlIndexClass(urls=self._history['posts'].load() if archive_mode != 'replay' else [])
+            self._all_image_urls = self._history['images'].load()
 
         # print('self._post_models')
         # print(self._post_models)
 
         self._new_posts = []
+        self._merged_run_stats = {}
         self._headers = {
             "user-agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_6_7 rv:5.0; IT) AppleWebKit/533.1.2 (KHTML, like Gecko) Version/7.0.8 Safari/533.1.2",
             # "Host": "news.tunisiatv.tn",
             # "Referer": "http://news.tunisiatv.tn",
         }
 
-        if should_use_same_session:
-            self.session = requests.Session()
-            self.session.headers.update(self._headers)
-
+        # one pooled session per host (should_use_same_session is kept for compatibility only)
+        self._sessions = SessionManagerClass(
+            headers=self._headers,
+            pool_size=http_pool_size,
+            retries=http_retries,
+            backoff_factor=http_backoff_factor,
+        )
+
+        self._circuit_breaker = None
+        if circuit_breaker_threshold:
+            self._circuit_breaker = CircuitBreakerClass(failure_threshold=circuit_breaker_threshold, reset_timeout=circuit_breaker_reset)
+
+        self._latency = None
+        if adaptive_timeouts:
+            if latency_histograms_json == '':
+                latency_histograms_json = (config_dir if config_dir else current_script_path + 'configs') + '/latency_histograms.json'
+            self._latency = LatencyTrackerClass(histograms_json=latency_histograms_json)
+
+        self._journal = None
+        self._journal_states = {}
+        self._resume = resume
+        if (enable_journal or resume) and not debug_mode:
+            if journal_dir == '':
+                journal_dir = (config_dir if config_dir else current_script_path + 'configs') + '/journal/'
+            self._journal = CrawlJournalClass(journal_dir=journal_dir)
+
+        self._archive = None
+        if archive_mode:
+            if archive_dir == '':
+                archive_dir = (config_dir if config_dir else current_script_path + 'configs') + '/archive/'
+            self._archive = ResponseArchiveClass(archive_dir=archive_dir, mode=archive_mode)
+
+        # the archive needs full responses (no 304)
+        self._http_cache = None
+        if enable_http_cache and not archive_mode:
+            if http_cache_dir == '':
+                http_cache_dir = (config_dir if config_dir else current_script_path + 'configs') + '/http_cache/'
+            self._http_cache = HttpCacheClass(cache_dir=http_cache_dir, max_size_mb=http_cache_max_mb)
 
         # load matcher
         self.matcher = MatcherClass(config_dir=config_dir)
 
+        # load boilerplate rules
+        if boilerplate_rules_csv == '':
+            boilerplate_rules_csv = (config_dir if config_dir else current_script_path + 'configs') + '/boilerplate_rules.csv'
+        self.boilerplate = BoilerplateClass(rules_csv=boilerplate_rules_csv)
+        self.date_normalizer = DateNormalizerClass()
+        # pages are parsed from bytes, in the charset of their host
+        self._charsets = CharsetCacheClass()
+
         # load analytics tracker
         self.enable_analytics = enable_analytics
         self.tracker = None
@@ -197,9 +338,63 @@ class ActuClass:
         regex = "(?P<url>https?://[^\s]+)"
         return re.findall(regex, text)
 
+    def get_html_tree(self, html):
+        """
+        Returns html as an lxml element (already parsed trees are returned as is)
+        """
+        if isinstance(html, str):
+            return lxml.html.fragment_fromstring(html, create_parent='div')
+        return html
+
+    def get_listing_region(self, html, plan, encoding='utf-8', chunk_size=16384):
+        """
+        Returns the root of html parsed up to the end of its first reg_ul container (None if there is none)
+        What precedes the container is emptied (menus, scripts...), what follows it is not parsed
+        Slower than a full parse when the container ends late (pull parsing costs more per byte): listing_parse_mode is opt-in per channel
+        """
+        parser = lxml.etree.HTMLPullParser(events=('start', 'end'), tag=plan.get_match_tag('reg_ul'), recover=True, huge_tree=True, encoding='utf-8')
+        # same input as parsel's Selector(text=html) / Selector(body=html)
+        if isinstance(html, bytes):
+            body = html.replace(b'\x00', b'').strip() if encoding == 'utf-8' else html.decode(encoding, errors='replace').strip().replace('\x00', '').encode('utf-8')
+        else:
+            body = str(html).strip().replace('\x00', '').encode('utf-8')
+        region = None
+        for offset in range(0, len(body), chunk_size):
+            parser.feed(body[offset:offset + chunk_size])
+            for event, element in parser.read_events():
+                if region is None:
+                    if event == 'start' and plan.matches('reg_ul', element):
+                        region = element
+                        # keep the preceding elements themselves (tag / attributes) for the sibling selectors
+                        for node in [region] + list(region.iterancestors())[:-1]:
+                            for sibling in node.itersiblings(preceding=True):
+                                del sibling[:]
+                                sibling.text = None
+                elif event == 'end' and element is region:
+                    # the rest of the last chunk was parsed too
+                    for node in [region] + list(region.iterancestors())[:-1]:
+                        for sibling in list(node.itersiblings()):
+                            node.getparent().remove(sibling)
+                    return region.getroottree().getroot()
+        parser.close()
+        return None
+
+    def get_selector(self, html, encoding='utf-8'):
+        """
+        Returns the Selector of a page: response bytes are parsed as is (no decoded copy), text as before
+        """
+        if isinstance(html, bytes):
+            return Selector(body=html, encoding=encoding, type='html')
+        return Selector(text=str(html))
+
+    def get_response_body(self, url, req):
+        """
+        Returns (raw body, charset of url's host) of req
+        """
+        return req.content, self._charsets.get_encoding(url, req)
+
     def extract_urls_html(self, html):
-        soup = BeautifulSoup(html, 'html.parser')
-        anchors = soup.find_all('a')
+        anchors = self.get_html_tree(html).iter('a')
         all_links = []
         for link in anchors:
             if(link.get('href') != '#'): 
@@ -207,6 +402,25 @@ class ActuClass:
                 all_links.append(linkText)
         return all_links
 
+    def get_content_tree(self, content_root):
+        """
+        Returns a copy of the content element (to be cleaned), spaces normalised like the content string
+        """
+        content_tree = copy.deepcopy(content_root)
+        for element in content_tree.iter():
+            if element.text:
+                element.text = element.text.replace(' ', ' ').replace('  ', ' ')
+            if element.tail and element is not content_tree:
+                element.tail = element.tail.replace(' ', ' ').replace('  ', ' ')
+        return content_tree
+
+    def get_meta_content(self, selector, property):
+        """
+        Returns the content of the first <meta property="..."> of the page (None if missing)
+        """
+        meta = selector.xpath('//meta[@property=$property]', property=property)
+        return meta[0].attrib.get('content') if meta else None
+
     def image_resize(self, image_path, mywidth):
         img = Image.open(image_path)
         wpercent = (mywidth/float(img.size[0]))
@@ -251,14 +465,69 @@ class ActuClass:
         #     return False
 
 
-    def get_session(self):
-        if self._should_use_same_session:
-            return self.session
-        return requests
+    def get_session(self, url):
+        """
+        Returns the pooled session of url's host
+        """
+        return self._sessions.get_session(url)
 
-    def save_csv(self, csv_file, output):
-        df = pd.DataFrame(output)
-        df.to_csv(csv_file, index=None, mode='a', quoting=csv.QUOTE_ALL)
+    def get_timeout(self, url):
+        """
+        Returns (connect, read) timeouts for url's host
+        """
+        if self._latency:
+            return self._latency.get_timeout(self.get_domain_from_url(url))
+        return (30, 30)
+
+    def http_request(self, method, url, archived=False, **kwargs):
+        """
+        Send every request (listing, api, detail, image) through the pooled sessions
+        Hosts failing repeatedly fail fast (CircuitOpenError) until a probe succeeds
+        archived requests are recorded to / replayed from the response archive
+        """
+        if self._archive and self._archive.is_replaying():
+            # never touch the network (not archived requests always miss)
+            if not archived:
+                raise ArchiveMissError('Not archived (replay mode): ' + str(url))
+            return self._archive.replay(method, url, kwargs.get('data'))
+
+        host = self.get_domain_from_url(url)
+        kwargs.setdefault('timeout', self.get_timeout(url))
+        if self._circuit_breaker:
+            self._circuit_breaker.before_request(host)
+        try:
+            response = self.get_session(url).request(method, url, **kwargs)
+        except requests.exceptions.RequestException as e:
+            if self._latency and isinstance(e, requests.exceptions.Timeout):
+                # a timed out request counts as slow as its timeout
+                timeout = kwargs['timeout']
+                if isinstance(timeout, tuple):
+                    timeout = timeout[0] if isinstance(e, requests.exceptions.ConnectTimeout) else timeout[1]
+                self._latency.record(host, timeout)
+            if self._circuit_breaker:
+                # any request error (not only timeouts): a half-open probe must be released
+                self._circuit_breaker.record_failure(host)
+            raise
+        except BaseException:
+            if self._circuit_breaker:
+                self._circuit_breaker.release_probe(host)
+            raise
+        if self._latency:
+            self._latency.record(host, response.elapsed.total_seconds())
+        if self._circuit_breaker:
+            self._circuit_breaker.record_success(host)
+        if self._archive and archived:
+            self._archive.record(method, url, response, kwargs.get('data'))
+        return response
+
+    def save_latency_histograms(self):
+        """
+        Persist latency histograms (with those recorded by workers) for the next runs
+        """
+        if not self._latency:
+            return False
+        self._latency.merge(self._merged_run_stats.pop('latency', {}))
+        return self._latency.save()
 
     def load_csv(self, csv_file, delimiter=';', pandas=False):
         if pandas:
@@ -272,68 +541,417 @@ class ActuClass:
                 results.append(row)
         return results
 
-    def extract_new_posts(self):
-        totalModels = len(self._post_models)
-        newPosts = []
+    def get_selector_plan(self, model):
+        """
+        Returns the compiled selectors of model (built once per post model)
+        """
+        key = model['_index'] if '_index' in model else model['batch_id']
+        if not key in self._selector_plans:
+            self._selector_plans[key] = SelectorPlanClass(model=model)
+        return self._selector_plans[key]
+
+    def get_models(self, model_indexes=None):
+        """
+        Returns post models (as dicts) ready to be processed (optionally only rows at model_indexes)
+        """
+        models = []
         for i in range(len(self._post_models)):
             model = self._post_models.iloc[i]
             model = dict(zip(self._post_models_header, model))
+            if model_indexes is not None and not i in model_indexes:
+                continue
+            model['_index'] = i
             model['loop_end'] = model['loop_end'] if self._is_deep_scan_mode else self._default_pagination
+            models.append(model)
+        return models
+
+    def extract_new_posts(self, model_indexes=None):
+        if self._use_async_engine and not self._debug_mode:
+            return asyncio.run(self.extract_new_posts_async(model_indexes))
+
+        models = self.get_models(model_indexes)
+        totalModels = len(models)
+        newPosts = []
+        for i, model in enumerate(models):
             print('#######################################')
             print('Processing #' + str(i+1) + ' / ' + str(totalModels) + ' - ' + model['batch_id'] + '...')
             if self.enable_analytics:
                 self.tracker.track_pageview('/extract_batch/' + str(model['batch_id']))
-            postsLinks = self.get_posts_from_pagination(model)
-            if self._debug_mode and not self._is_deep_scan_mode:
-                print('postsLinks')
-                pprint(postsLinks)
-                # exit()
+            if self.replay_journal_posts(model, newPosts):
+                print('Batch already extracted (journal)')
+                continue
+            if self._debug_mode:
+                postsLinks = self.get_posts_from_pagination(model)
+                if not self._is_deep_scan_mode:
+                    print('postsLinks')
+                    pprint(postsLinks)
+                    # exit()
+            else:
+                # detail pages are extracted while the next listing pages are fetched
+                postsLinks = self.stream_posts_from_pagination(model)
             # print(postsLinks)
 
+            total_links = 0
+            for link in tqdm(postsLinks):
+                self.add_post_from_link(link, model, newPosts)
+                total_links += 1
+
             if self._debug_info:
                 total_pages = model['loop_end'] if ('loop_end' in model and model['loop_end']) else 'N/A'
-                print("Got " + str(len(postsLinks)) + " from " + str(total_pages) + " pages")
+                print("Got " + str(total_links) + " from " + str(total_pages) + " pages")
                 print('------')
-            index = 1
-            for link in tqdm(postsLinks):
-                # Check if post is already processed
-                # print("Checking " + str(index) + " / " + str(len(postsLinks)) + " ...")
-                url = link['link']
-                if (url and not url in self._all_post_urls):
-                    # print("Processing " + str(url) + " ...")
-                    post = self.get_actu_from_link(link, model)
-                    if self._debug_mode and not self._is_deep_scan_mode:
-                        print('post')
-                        pprint(post)
-                        exit()
-                    
-                    if post and post['slug'] and post['slug'] != '':
-                        newPosts.append(post)
-                        if 'sources' in post and not post['sources'] == '':
-                            self._all_post_urls.append(post['sources'])
+            self.journal_batch_done(model)
+
+        self.parse_posts_dates(newPosts)
+        self._new_posts = newPosts
+
+        return newPosts
+
+    def add_post_from_link(self, link, model, newPosts, post=None, replayed=False, fetch=True):
+        """
+        Extract (unless already done: post) and keep the post of link if it was not processed yet
+        fetch: False when the post was extracted beforehand (async engine), a missing post is then never fetched here
+        """
+        # Check if post is already processed
+        url = link['link']
+        if not replayed and url in self.get_journal_state(model)['links']:
+            # committed by replay_journal_posts
+            return
+        if (url and not url in self._all_post_urls):
+            # print("Processing " + str(url) + " ...")
+            if post is None and fetch:
+                post = self.get_actu_from_link(link, model)
+            if self._debug_mode and not self._is_deep_scan_mode:
+                self.parse_posts_dates([post] if post else [])
+                print('post')
+                pprint(post)
+                exit()
+
+            if post and post['slug'] and post['slug'] != '':
+                newPosts.append(post)
+                if 'sources' in post and not post['sources'] == '':
+                    self._all_post_urls.add(post['sources'], model['batch_id'])
+                if self._journal and not replayed:
+                    self._journal.append(self.get_journal_key(model), {'type': 'post', 'link': link, 'post': post})
+            else:
+                print('@@@@@@@@@@@@@@@@@@')
+                print('Post Export Issue !')
+                print(url)
+                print(post)
+                print('@@@@@@@@@@@@@@@@@@')
+        else:
+            if url:
+                print(str(url) + ' was already processed')
+            else:
+                print(colored(str(url) + 'URL was not found !', 'red'))
+
+    '''
+    # Async engine
+    Batches run concurrently (batches of a same host run one after another),
+    listing and detail pages are fetched in a thread pool, limited globally
+    (max_concurrency) and per host (max_concurrency_per_host).
+    Posts are committed in the same order and with the same duplicate checks
+    as the sequential path, so both produce the same posts.
+    '''
+    async def extract_new_posts_async(self, model_indexes=None):
+        models = self.get_models(model_indexes)
+        self._async_global_limit = asyncio.Semaphore(self._max_concurrency)
+        self._async_host_limits = {}
+        # url => its first detail job
+        self._async_dispatched_urls = {}
+        committed = [asyncio.Event() for model in models]
+        newPosts = []
+
+        # chain batches sharing the same host
+        previous_by_host = {}
+        tasks = []
+        with ThreadPoolExecutor(max_workers=self._max_concurrency) as executor:
+            for i, model in enumerate(models):
+                host = self.get_domain_from_url(self.get_pagination_url(model))
+                tasks.append(self.crawl_batch_async(i, models, previous_by_host.get(host), committed, newPosts, executor))
+                previous_by_host[host] = i
+            await asyncio.gather(*tasks)
+
+        self.parse_posts_dates(newPosts)
+        self._new_posts = newPosts
+
+        return newPosts
+
+    async def crawl_batch_async(self, i, models, previous_same_host, committed, newPosts, executor):
+        model = models[i]
+        try:
+            if previous_same_host is not None:
+                await committed[previous_same_host].wait()
+
+            print('Processing #' + str(i+1) + ' / ' + str(len(models)) + ' - ' + model['batch_id'] + '...')
+            if self.enable_analytics:
+                self.tracker.track_pageview('/extract_batch/' + str(model['batch_id']))
+            # detail pages are dispatched as soon as their listing page is parsed,
+            # then committed in listing order as they finish: (link, job) of links not committed yet
+            queue = collections.deque()
+            journal_replayed = False
+            total_links = 0
+            async for articles in self.iter_posts_from_pagination_async(model, executor):
+                for link in articles:
+                    total_links += 1
+                    queue.append((link, self.dispatch_post_async(link, model, executor)))
+                # commit in models order: only once the previous batch is committed
+                if not journal_replayed and (i == 0 or committed[i-1].is_set()):
+                    self.replay_journal_posts(model, newPosts)
+                    journal_replayed = True
+                if journal_replayed:
+                    self.commit_finished_posts(model, queue, newPosts)
+                # bound the links not committed yet (pauses pagination)
+                while len(queue) >= self._links_queue_size:
+                    if not journal_replayed:
+                        await committed[i-1].wait()
+                        self.replay_journal_posts(model, newPosts)
+                        journal_replayed = True
                     else:
-                        print('@@@@@@@@@@@@@@@@@@')
-                        print('Post Export Issue !')
-                        print(url)
-                        print(post)
-                        print('@@@@@@@@@@@@@@@@@@')
+                        await asyncio.wait([queue[0][1]])
+                    self.commit_finished_posts(model, queue, newPosts)
+
+            if self._debug_info:
+                total_pages = model['loop_end'] if ('loop_end' in model and model['loop_end']) else 'N/A'
+                print(model['batch_id'] + ": got " + str(total_links) + " from " + str(total_pages) + " pages")
+
+            if not journal_replayed:
+                if i > 0:
+                    await committed[i-1].wait()
+                self.replay_journal_posts(model, newPosts)
+            while queue:
+                self.commit_finished_posts(model, queue, newPosts)
+                if queue:
+                    await asyncio.wait([queue[0][1]])
+            self.journal_batch_done(model)
+        finally:
+            committed[i].set()
+
+    def dispatch_post_async(self, link, model, executor):
+        """
+        Returns the detail job of link (None if nothing to fetch)
+        """
+        url = link['link']
+        if not url or url in self._all_post_urls:
+            return None
+        first = self._async_dispatched_urls.get(url)
+        if first is None:
+            job = asyncio.ensure_future(self.run_limited_async(url, executor, self.get_actu_from_link, link, model))
+            self._async_dispatched_urls[url] = job
+            return job
+        return asyncio.ensure_future(self.get_duplicate_post_async(first, link, model, executor))
+
+    async def get_duplicate_post_async(self, first, link, model, executor):
+        """
+        Post of a link listed again: fetched again (in the thread pool) only if its first fetch gave no post, like the sequential path
+        """
+        post = await first
+        if post and post['slug']:
+            return None
+        return await self.run_limited_async(link['link'], executor, self.get_actu_from_link, link, model)
+
+    def commit_finished_posts(self, model, queue, newPosts):
+        """
+        Commit the finished head of queue, stops at the first detail job still running (listing order)
+        """
+        while queue and (queue[0][1] is None or queue[0][1].done()):
+            link, job = queue.popleft()
+            self.add_post_from_link(link, model, newPosts, post=job.result() if job else None, fetch=False)
+
+    async def run_limited_async(self, url, executor, func, *args):
+        host = self.get_domain_from_url(url)
+        if not host in self._async_host_limits:
+            self._async_host_limits[host] = asyncio.Semaphore(self._max_concurrency_per_host)
+        async with self._async_host_limits[host]:
+            async with self._async_global_limit:
+                loop = asyncio.get_running_loop()
+                return await loop.run_in_executor(executor, func, *args)
+
+    async def iter_posts_from_pagination_async(self, model, executor, skip=False):
+        url = self.get_pagination_url(model)
+        extraction_mode, start, step, end = self.get_pagination_range(model)
+        counter = start
+        haveMore = not skip
+        processed_pages = 0
+        prefetched = collections.deque()
+        next_counter = start
+        try:
+            while counter <= (end*step) and haveMore:
+                print(model['batch_id'] + ': processing page ' + str(int(counter)) + '/' + str(end) + '...')
+                # keep the next prefetch_pages listing pages in flight
+                while len(prefetched) < max(1, self._prefetch_pages) and next_counter <= (end*step):
+                    prefetched.append(asyncio.ensure_future(self.run_limited_async(url, executor, self.extract_posts_pagination, next_counter, model)))
+                    next_counter += step
+                articles = await prefetched.popleft()
+
+                if (articles and len(articles) > 0):
+                    # before yielding: the consumer may commit the page's new posts before the generator resumes
+                    processed_pages = processed_pages + 1 if self.is_processed_page(articles) else 0
+                    yield articles
+                    if self._early_stop_pages and processed_pages >= self._early_stop_pages:
+                        self.stop_early(model, counter)
+                        haveMore = False
                 else:
-                    if url:
-                        print(str(url) + ' was already processed')
-                    else:
-                        print(colored(str(url) + 'URL was not found !', 'red'))
+                    haveMore = False
+
+                counter += step
+        finally:
+            for task in prefetched:
+                task.cancel()
+
+
+    def merge_new_posts(self, batches_posts):
+        """
+        Merge posts extracted by other processes (one list per batch, in models order)
+        Duplicates are dropped with the same rule as extract_new_posts
+        """
+        newPosts = []
+        models = self.get_models()
+        for i, posts in enumerate(batches_posts):
+            batch_id = models[i]['batch_id'] if len(models) == len(batches_posts) else ''
+            for post in posts:
+                url = post['source_url']
+                if url and url in self._all_post_urls:
+                    print(str(url) + ' was already processed')
+                    continue
+                newPosts.append(post)
+                if 'sources' in post and not post['sources'] == '':
+                    self._all_post_urls.add(post['sources'], batch_id)
 
-                # print('-------------')
-                index += 1
-        
         self._new_posts = newPosts
 
         return newPosts
 
+    def parse_posts_dates(self, posts):
+        """
+        Parse the raw published_at / deadline of posts (in place): one vectorized call per (batch, field, format)
+        """
+        output_formats = {'published_at': '%Y-%m-%d 08:00:00', 'deadline': '%Y-%m-%d 23:59:00'}
+        groups = collections.defaultdict(list)
+        for post in posts:
+            date_formats = post.pop('_date_formats', None) if isinstance(post, dict) else None
+            if not date_formats:
+                continue
+            for field in output_formats:
+                if field in date_formats:
+                    groups[(date_formats['batch_id'], field, date_formats[field])].append(post)
+
+        for (batch_id, field, date_format), group in groups.items():
+            dates = [post[field] for post in group]
+            parsed = self.date_normalizer.parse_many(dates, date_format, output_formats[field], batch_id)
+            for post, date, value in zip(group, dates, parsed):
+                if self._debug_mode and value == date:
+                    print('Date extract failed (' + field + ') !')
+                    print(date)
+                post[field] = value
+        return posts
 
-    def load_all_posts(self):
-        csv_all_posts = glob.glob(self._db_storage_csv+'*.csv')
-        posts = pd.concat(map(pd.read_csv, csv_all_posts))
+    def get_journal_key(self, model):
+        return str(model['_index']) + '-' + slugify(str(model['batch_id']))
+
+    def get_journal_state(self, model):
+        """
+        Returns what the journal recorded for model's batch (only when resuming)
+        """
+        key = self.get_journal_key(model)
+        if not key in self._journal_states:
+            if self._journal and self._resume:
+                self._journal_states[key] = self._journal.load(key)
+            else:
+                self._journal_states[key] = {'pages': {}, 'posts': [], 'done': False}
+            self._journal_states[key]['links'] = set(record['link']['link'] for record in self._journal_states[key]['posts'])
+        return self._journal_states[key]
+
+    def replay_journal_posts(self, model, newPosts):
+        """
+        Add posts extracted before a crash, returns True if the whole batch was done
+        """
+        state = self.get_journal_state(model)
+        if state['posts']:
+            print(str(model['batch_id']) + ': ' + str(len(state['posts'])) + ' posts replayed from journal')
+        for record in state['posts']:
+            self.add_post_from_link(record['link'], model, newPosts, post=record['post'], replayed=True)
+        return state['done']
+
+    def journal_batch_done(self, model):
+        if self._journal:
+            self._journal.append(self.get_journal_key(model), {'type': 'done'})
+
+    def clear_journal(self):
+        """
+        Remove the journal once the run is saved
+        """
+        if self._journal:
+            self._journal.clear()
+
+    def get_run_stats(self):
+        """
+        Returns counters of the current run (including those merged from workers)
+        """
+        stats = {}
+        if self._http_cache:
+            stats['http_cache'] = dict(self._http_cache.stats)
+        if self._early_stops:
+            stats['early_stop'] = dict(self._early_stops)
+        if self._circuit_breaker and self._circuit_breaker.get_stats():
+            stats['circuit_breaker'] = self._circuit_breaker.get_stats()
+        if self._latency:
+            stats['latency'] = self._latency.get_histograms()
+        if self._archive:
+            stats['archive'] = dict(self._archive.stats)
+        if any(encoding != 'utf-8' for encoding in self._charsets.get_stats()):
+            stats['charsets'] = self._charsets.get_stats()
+        return self.sum_stats(stats, self._merged_run_stats)
+
+    def merge_run_stats(self, stats):
+        """
+        Add counters of another process (see get_run_stats)
+        """
+        self._merged_run_stats = self.sum_stats(self._merged_run_stats, stats)
+
+    def sum_stats(self, a, b, sign=1):
+        result = dict(a)
+        for key, value in b.items():
+            if isinstance(value, dict):
+                result[key] = self.sum_stats(result.get(key, {}), value, sign)
+            else:
+                result[key] = result.get(key, 0) + sign * value
+        return result
+
+    def print_run_summary(self):
+        stats = self.get_run_stats()
+        print('#######################################')
+        print('Run summary')
+        if 'http_cache' in stats:
+            cache = stats['http_cache']
+            print('# HTTP cache: ' + str(cache.get('hits', 0)) + ' hits / ' + str(cache.get('misses', 0)) + ' misses (' + str(cache.get('stores', 0)) + ' stored, ' + str(cache.get('evictions', 0)) + ' evicted)')
+        if 'early_stop' in stats:
+            for batch_id, saved in stats['early_stop'].items():
+                print('# Early stop: ' + str(batch_id) + ' (' + str(saved) + ' listing requests saved)')
+        if 'circuit_breaker' in stats:
+            for host, breaker in stats['circuit_breaker'].items():
+                print(colored('# Circuit breaker: ' + str(host) + ' opened ' + str(breaker['trips']) + ' time(s), ' + str(breaker['rejected']) + ' requests failed fast', 'red'))
+        if 'archive' in stats:
+            archive = stats['archive']
+            print('# Response archive: ' + str(archive.get('recorded', 0)) + ' recorded / ' + str(archive.get('replayed', 0)) + ' replayed (' + str(archive.get('missing', 0)) + ' missing)')
+        if 'charsets' in stats:
+            print('# Charsets (hosts): ' + ', '.join(str(encoding) + ' x ' + str(hosts) for encoding, hosts in stats['charsets'].items()))
+        if self._latency:
+            print('# Adaptive timeouts: ' + str(len(self._latency.get_tuned_hosts())) + ' hosts tuned')
+
+    def load_all_posts(self, columns=None):
+        """
+        Returns every exported post (only columns if given): posts-*.parquet, else posts-*.csv
+        """
+        all_posts = []
+        for csv_file in glob.glob(os.path.join(self._db_storage_csv, '*.csv')):
+            parquet_file = csv_file[:-len('.csv')] + '.parquet'
+            if os.path.isfile(parquet_file):
+                # typed copy: only the needed columns are read, no text parsing
+                all_posts.append(self._parquet.read(parquet_file, columns=columns, as_text=True))
+            else:
+                all_posts.append(pd.read_csv(csv_file, usecols=columns))
+        posts = pd.concat(all_posts)
         posts = posts.replace(np.nan, '', regex=True)
         return posts
 
@@ -369,6 +987,10 @@ class ActuClass:
         newPosts.to_csv(latest_posts, index=None, mode='a', quoting=csv.QUOTE_ALL)
 
         print('# Saved to ' + latest_posts)
+        if self._should_save_parquet:
+            latest_parquet = latest_posts[:-len('.csv')] + '.parquet'
+            self._parquet.write(newPosts, latest_parquet)
+            print('# Saved to ' + latest_parquet)
         print('# Added ' + str(len(newPosts)) + ' new posts')
 
 
@@ -378,42 +1000,82 @@ class ActuClass:
     # - save publications duplicates ?
     '''
     def save_already_processed_items(self):
+        if self._archive and self._archive.is_replaying():
+            print('Replay mode: processed urls are not saved')
+            return False
+        if self._state:
+            print('Save processed urls to the state store...')
+            batch_ids = [self._all_post_urls.get_batch_id(p['sources']) for p in self._new_posts]
+            self._state.add('posts', [(self._all_post_urls.canonical(p['sources']), batch_id) for p, batch_id in zip(self._new_posts, batch_ids)])
+            self._state.add('publications', [(url, '') for url in self._all_publications_urls])
+            self._state.add('images', [(p['image_url'], batch_id) for p, batch_id in zip(self._new_posts, batch_ids)])
+            print('# Saved to ' + self._state_db)
+            return True
         print('Save all post urls (avoid duplications)...')
         ######
         # input form self._all_post_urls ??
         ######
         # newPostsId = [p['sources'] for p in self._new_posts]
-        # exclude 'mtcen.gov.tn' because it has not valid temp urls
-        newPostsId = [urllib.parse.unquote(p['sources']) if not 'mtcen.gov.tn' in p['sources'] else p['sources'] for p in self._new_posts]
+        # same form as the index keys (unquoted)
+        newPostsId = [self._all_post_urls.canonical(p['sources']) for p in self._new_posts]
         allPostsUrls = newPostsId  # CSV open mode = a (add to file)
         all_processed_posts = self._db_already_processed_posts_csv
-        self.save_csv(all_processed_posts, allPostsUrls)
+        self._history['posts'].append(allPostsUrls)
         print('# Saved to ' + all_processed_posts)
+        if self._url_index is not None:
+            self._url_index.merge(allPostsUrls, all_processed_posts, self._history['posts'].get_last_sizes(), ProcessedUrlIndexClass().canonical)
 
-        # Save all publications urls (avoid duplications)
+        # Save the publications urls of the run (avoid duplications)
         print('Save all publications urls (avoid duplications)...')
         all_processed_publications = self._db_already_processed_publications_csv
-        self.save_csv(all_processed_publications, self._all_publications_urls)
+        self._history['publications'].append(self._all_publications_urls)
         print('# Saved to ' + all_processed_publications)
 
         print('Save all image urls (avoid duplications)...')
         imagesUrls = [p['image_url'] for p in self._new_posts]
         all_processed_images = self._db_already_processed_images_csv
-        self.save_csv(all_processed_images, imagesUrls)
+        self._history['images'].append(imagesUrls)
         print('# Saved to ' + all_processed_images)
 
+        self.compact_history()
+
+    def compact_history(self, force=False):
+        """
+        Dedupe, sort and rewrite the processed_*.csv files past their duplicate ratio (all of them if force)
+        """
+        compacted = {}
+        for name, history in self._history.items():
+            counts = history.compact() if force else history.compact_if_needed()
+            if not counts:
+                continue
+            compacted[name] = counts
+            print('# Compacted processed ' + name + ' urls: ' + str(counts[0]) + ' -> ' + str(counts[1]) + ' rows')
+            if name == 'posts' and self._url_index is not None:
+                # same urls: the index only records the new csv size
+                self._url_index.merge([], self._db_already_processed_posts_csv, history.get_last_sizes(), ProcessedUrlIndexClass().canonical)
+        return compacted
+
     def extract_posts_pagination_html(self, counter, model):
         single = model['page_actu_loop']
         url = single.replace('ACTU_NBR', str(int(counter)))
         # print(url)
 
+        # revalidate cached listing page (If-None-Match / If-Modified-Since)
+        headers = self._headers
+        cached = self._http_cache.get(url) if self._http_cache else None
+        if cached:
+            headers = dict(self._headers)
+            headers.update(self._http_cache.get_conditional_headers(cached))
+
         # req = self.get_session().get(url, headers=self._headers, verify=False, timeout=30, allow_redirects=True)
         try:
-            req = self.get_session().get(
+            req = self.http_request(
+                'GET',
                 url,
-                headers=self._headers,
+                archived=True,
+                headers=headers,
                 verify=False,
-                timeout=30,           # still enforce a reasonable timeout
+                timeout=self.get_timeout(url), # still enforce a reasonable timeout
                 allow_redirects=True
             )
             req.raise_for_status()    # optional: catch HTTP 4xx/5xx
@@ -423,26 +1085,54 @@ class ActuClass:
         except requests.exceptions.RequestException as e:
             print(f"Request failed for {url}: {e}")
             req = None
-        
+
+        if req is not None and req.status_code == 304 and cached:
+            # unchanged page: reuse cached articles (parse cached body only if the model changed)
+            self._http_cache.hit(cached)
+            articles = self._http_cache.get_articles(cached, self.get_listing_signature(model))
+            if articles is None:
+                html = self._http_cache.get_body(cached)
+                if not html:
+                    return []
+                articles = self.get_actu_articles_from_page(html, model)
+                # next 304s of this page skip parsing again
+                self._http_cache.update_articles(cached, self.get_listing_signature(model), articles)
+                return articles
+            if not articles:
+                return articles
+            return [article for article in articles if not self.is_already_processed_link(article['link'])]
+
         if req:
-            req.encoding = 'utf-8'
-            html = req.text
+            html, encoding = self.get_response_body(url, req)
             # print(html)
-            return self.get_actu_articles_from_page(html, model)
+            articles = self.get_actu_articles_from_page(html, model, encoding)
+            if self._http_cache:
+                self._http_cache.miss()
+                self._http_cache.store(url, req, html.decode(encoding, errors='replace'), self.get_listing_signature(model), articles)
+            return articles
         
         return []
 
+    def get_listing_signature(self, model):
+        """
+        Returns a hash of the model fields used to parse a listing page
+        """
+        keys = ['batch_id', 'lang', 'page_actu_loop', 'reg_ul', 'reg_li', 'reg_li_a', 'reg_li_title', 'reg_li_date', 'reg_li_image']
+        fields = [str(model[key]) if key in model else '' for key in keys]
+        return hashlib.sha1('|'.join(fields).encode('utf-8')).hexdigest()
 
     def extract_posts_pagination_api(self, counter, model):
         api_endpoint = model['api_endpoint']
         api_data = model['api_data']
         api_nbr_key = model['api_nbr_key']
+        # copy: pages may be fetched concurrently (prefetch)
+        api_data = dict(api_data) if isinstance(api_data, dict) else api_data
         if not api_nbr_key in api_data:
             print(str(api_nbr_key) + ' not found in set api_data object !')
         api_data[api_nbr_key] = str(int(counter))
 
-        # define request header
-        headers = self._headers
+        # define request header (copy: batches may run concurrently)
+        headers = dict(self._headers)
         if ('api_header_accept' in model and model['api_header_accept']):
             headers['accept'] = model['api_header_accept']
         if ('api_header_accept_language' in model and model['api_header_accept_language']):
@@ -469,11 +1159,11 @@ class ActuClass:
 
         # print(api_endpoint)
         # req = self.get_session().post(api_endpoint, headers=headers, data=api_data, verify=False, timeout=30, allow_redirects=True)
-        req = self.get_session().request(method, api_endpoint, headers=headers, data=api_data, verify=False, timeout=30, allow_redirects=True)
+        req = self.http_request(method, api_endpoint, archived=True, headers=headers, data=api_data, verify=False, timeout=self.get_timeout(api_endpoint), allow_redirects=True)
         # print('req.text')
         # print(req)
         # print(req.text)
-        req.encoding = 'utf-8'
+        req.encoding = self._charsets.get_encoding(api_endpoint, req)
 
         if ('api_result_type' in model and model['api_result_type'] == 'json'):
             result = req.json()
@@ -497,48 +1187,167 @@ class ActuClass:
 
 
 
-        # print('articles')
-    def get_posts_from_pagination(self, model):
+    def extract_posts_pagination(self, counter, model):
+        # listing page already fetched before a crash
+        pages = self.get_journal_state(model)['pages']
+        if str(int(counter)) in pages:
+            return pages[str(int(counter))]
+
+        extraction_mode = self.get_pagination_range(model)[0]
+        if extraction_mode == 'api':
+            articles = self.extract_posts_pagination_api(counter, model)
+        else:
+            articles = self.extract_posts_pagination_html(counter, model)
+
+        if self._journal:
+            self._journal.append(self.get_journal_key(model), {'type': 'page', 'counter': str(int(counter)), 'articles': articles})
+        return articles
+
+    def get_pagination_url(self, model):
         """
-        Returns current posts_from_pagination
+        Returns the url used to loop over the pagination (html page or api endpoint)
         """
-        links = []
+        if self.get_pagination_range(model)[0] == 'api':
+            return model['api_endpoint']
+        return model['page_actu_loop']
 
+    def get_pagination_range(self, model):
+        """
+        Returns (extraction_mode, start, step, end) of the pagination loop
+        """
         # api / html / rss (future)
         extraction_mode = model['extraction_mode'] if ('extraction_mode' in model and model['extraction_mode'] and model['extraction_mode'] in ['html', 'api']) else 'html'
 
         start = model['loop_start'] if ('loop_start' in model and model['loop_start'] and model['loop_start'] >= 0) else 1
         step = model['loop_step'] if ('loop_step' in model and model['loop_step'] and model['loop_step'] > 1) else 1
         end = model['loop_end'] if ('loop_end' in model and model['loop_end'] and model['loop_end'] >= 1) else 10
+        return extraction_mode, start, step, end
+
+        # print('articles')
+    def get_posts_from_pagination(self, model):
+        """
+        Returns current posts_from_pagination
+        """
+        links = []
+        for articles in self.iter_posts_from_pagination(model):
+            links.extend(articles)
+        return links
+
+    def iter_posts_from_pagination(self, model):
+        """
+        Yields the articles of each listing page
+        With prefetch_pages > 1, the next listing pages are fetched concurrently
+        """
+        extraction_mode, start, step, end = self.get_pagination_range(model)
         # print('step')
         # print(step)
         # print('end')
         # print((end*step))
         counter = start
         haveMore = True
-        while counter <= (end*step) and haveMore:
-            print('Processing page ' + str(int(counter)) + '/' + str(end) + '...')
+        processed_pages = 0
+        prefetched = collections.deque()
+        next_counter = start
+        executor = ThreadPoolExecutor(max_workers=self._prefetch_pages) if self._prefetch_pages > 1 else None
+        try:
+            while counter <= (end*step) and haveMore:
+                print('Processing page ' + str(int(counter)) + '/' + str(end) + '...')
+
+                # try:
+                if executor:
+                    # keep the next prefetch_pages listing pages in flight
+                    while len(prefetched) < self._prefetch_pages and next_counter <= (end*step):
+                        prefetched.append(executor.submit(self.extract_posts_pagination, next_counter, model))
+                        next_counter += step
+                    articles = prefetched.popleft().result()
+                else:
+                    articles = self.extract_posts_pagination(counter, model)
+
+                if (articles and len(articles) > 0):
+                    # before yielding: the consumer may commit the page's new posts before the generator resumes
+                    processed_pages = processed_pages + 1 if self.is_processed_page(articles) else 0
+                    yield articles
+                    if self._early_stop_pages and processed_pages >= self._early_stop_pages:
+                        self.stop_early(model, counter)
+                        haveMore = False
+                else:
+                    haveMore = False
+                # except:
+                #     # haveMore = False
+                #     print(colored('ISSUE at this URL: ' + url, 'red'))
 
-            # try:
-            if extraction_mode == 'html':
-                articles = self.extract_posts_pagination_html(counter, model)
-            if extraction_mode == 'api':
-                articles = self.extract_posts_pagination_api(counter, model)
+                counter += step
+        finally:
+            # pages after the last one are not needed (running requests end in background)
+            if executor:
+                executor.shutdown(wait=False, cancel_futures=True)
 
-            if (articles and len(articles) > 0):
-                links = links + articles
-            else:
-                haveMore = False
-            # except:
-            #     # haveMore = False
-            #     print(colored('ISSUE at this URL: ' + url, 'red'))
+    def stream_posts_from_pagination(self, model):
+        """
+        Yields pagination links as soon as their listing page is parsed
+        Listing pages are fetched by a producer thread, at most links_queue_size links ahead
+        """
+        links = queue.Queue(maxsize=self._links_queue_size)
+        done = object()
+        errors = []
+        stop = threading.Event()
 
-            counter += step
-            
-        return links
+        def put(item):
+            while not stop.is_set():
+                try:
+                    links.put(item, timeout=1)
+                    return True
+                except queue.Full:
+                    pass
+            return False
 
+        def produce():
+            try:
+                for articles in self.iter_posts_from_pagination(model):
+                    for article in articles:
+                        if not put(article):
+                            return
+            except Exception as e:
+                errors.append(e)
+            finally:
+                put(done)
+
+        producer = threading.Thread(target=produce, daemon=True)
+        producer.start()
+        try:
+            while True:
+                link = links.get()
+                if link is done:
+                    break
+                yield link
+        finally:
+            stop.set()
+        producer.join()
+        if errors:
+            raise errors[0]
+
+    def is_processed_page(self, articles):
+        """
+        True if every link of a listing page was already processed (empty links have nothing to fetch)
+        """
+        return all(not article['link'] or article['link'] in self._all_post_urls for article in articles)
+
+    def stop_early(self, model, counter):
+        """
+        Record the listing requests saved by ending model's pagination at counter
+        """
+        extraction_mode, start, step, end = self.get_pagination_range(model)
+        saved = len(range(int(counter + step), int(end*step) + 1, int(step)))
+        self._early_stops[model['batch_id']] = self._early_stops.get(model['batch_id'], 0) + saved
+        print(colored(str(model['batch_id']) + ': ' + str(self._early_stop_pages) + ' already processed pages in a row, stopping (' + str(saved) + ' listing requests saved)', 'yellow'))
+
+    def is_already_processed_link(self, link):
+        """
+        Listing links already processed are skipped (monitoring mode only)
+        """
+        return not self._is_deep_scan_mode and (link and link in self._all_post_urls)
 
-    def get_actu_articles_from_page(self, html, model):
+    def get_actu_articles_from_page(self, html, model, encoding='utf-8'):
         result = False
 
         reg_ul = model['reg_ul']
@@ -547,11 +1356,14 @@ class ActuClass:
         reg_li_title = model['reg_li_title'] if 'reg_li_title' in model and model['reg_li_title'] else False
         reg_li_date = model['reg_li_date'] if 'reg_li_date' in model and model['reg_li_date'] else False
         reg_li_image = model['reg_li_image'] if 'reg_li_image' in model and model['reg_li_image'] else False
-        css = str(reg_ul) + ' ' + str(reg_li)
+        plan = self.get_selector_plan(model)
         # css = str(reg_ul) + ' ' + str(reg_li) + ' ' + str(reg_li_a)
 
-        selector = Selector(text=str(html))
-        all_links = selector.css(css)
+        root = self.get_listing_region(html, plan, encoding) if plan.has_matcher('reg_ul') else None
+        if root is None and plan.has_matcher('reg_ul') and self._debug_mode:
+            print(colored('reg_ul not found while reading the page, parsing the whole page', 'yellow'))
+        selector = Selector(root=root, type='html') if root is not None else self.get_selector(html, encoding)
+        all_links = plan.select('reg_list', selector)
         # print('all_links')
         # print(len(all_links))
         # exit()
@@ -576,7 +1388,8 @@ class ActuClass:
                 # exit()
                 # print(post)
                 # print(post.css(reg_li_a))
-                link = post.css(reg_li_a).attrib['href'] if not link and reg_li_a and 'href' in post.css(reg_li_a).attrib else link
+                anchor = plan.select('reg_li_a', post).attrib if not link and reg_li_a else {}
+                link = anchor['href'] if 'href' in anchor else link
                 link = link if link else ''
                 if link and not link == '' and not self.is_valid_url(link):
                     if (not link.startswith('/')):
@@ -605,23 +1418,23 @@ class ActuClass:
                     print('link')
                     print(link)
                     
-                title = post.css(reg_li_title).get() if reg_li_title else False
+                title = plan.select('reg_li_title', post).get() if reg_li_title else False
                 title = title if title else ''
                 title = title.strip()
                 
-                image = post.css(reg_li_image).get() if reg_li_image else False
+                image = plan.select('reg_li_image', post).get() if reg_li_image else False
                 # print('image')
                 # print(image)
                 image = image if image else False
 
-                date = post.css(reg_li_date).get() if reg_li_date else False
+                date = plan.select('reg_li_date', post).get() if reg_li_date else False
                 # print('date')
                 # print(date)
                 if date:
                     date = self.cleanDate(date, model['batch_id'])
 
                 # check if link is already processed (monitoring mode only)
-                isAleadyProcessed = not self._is_deep_scan_mode and (link and link in self._all_post_urls)
+                isAleadyProcessed = self.is_already_processed_link(link)
 
                 if not isAleadyProcessed:
                     result.append({
@@ -658,7 +1471,7 @@ class ActuClass:
         # Send req
         req = False
         try:
-            req = self.get_session().get(url, headers=self._headers, verify=False, timeout=30)
+            req = self.http_request('GET', url, archived=True, headers=self._headers, verify=False, timeout=self.get_timeout(url))
         except:
             req = False
 
@@ -666,13 +1479,11 @@ class ActuClass:
             print(colored('Cant get URL: ' + str(url), 'red'))
             return False
 
-        req.encoding = 'utf-8'
-        # req.encoding = 'windows-1256'
-        html = req.text
-        # print(html)
+        # charset of the host (windows-1256 sites...), detected once
+        html, encoding = self.get_response_body(url, req)
         # print(html[:500])
         # exit()
-        selector = Selector(text=str(html))
+        selector = self.get_selector(html, encoding)
 
         # Process regexes
         page_actu_home = model['page_actu_home'] if 'page_actu_home' in model and model['page_actu_home'] else False
@@ -685,18 +1496,20 @@ class ActuClass:
         apply_url = model['apply_url'] if 'apply_url' in model and model['apply_url'] else False
         eligibility_criteria = model['eligibility_criteria'] if 'eligibility_criteria' in model and model['eligibility_criteria'] else False
         
-        title = selector.css(single_title).get() if single_title else False
-        content = selector.css(single_content).get() if single_content else False
+        plan = self.get_selector_plan(model)
+        title = plan.select('single_title', selector).get() if single_title else False
+        content_nodes = plan.select('single_content', selector) if single_content else False
+        content = content_nodes.get() if single_content else False
         if not date:
-            date = selector.css(single_date).get() if single_date else False
+            date = plan.select('single_date', selector).get() if single_date else False
         
-        deadline = selector.css(deadline).get() if deadline else False
+        deadline = plan.select('deadline', selector).get() if deadline else False
         if not deadline:
             deadline = date
 
-        eligibility_criteria = selector.css(eligibility_criteria).get() if eligibility_criteria else False
+        eligibility_criteria = plan.select('eligibility_criteria', selector).get() if eligibility_criteria else False
 
-        tags = selector.css(single_tags) if single_tags else False
+        tags = plan.select('single_tags', selector) if single_tags else False
 
         if not title and 'title' in link and link['title'] != '':
             title = link['title']
@@ -757,25 +1570,18 @@ class ActuClass:
         
         new['content_html'] = content_minified
             
-        # clean up content
+        # clean up content (on a copy of the page tree: no html re-parsing)
         # remove extra elements
-        content = re.sub('<ul class="breadcrumb">.*?</ul>', '', content)
-        content = self.cleanMe(content)
-        # content = re.sub('<style type="text/css">*</style>', '', content)
-        content = re.sub(
-            '<div class="addthis_inline_share_toolbox".*?</ul>', '', content)
-        content = re.sub('<div class="mainFig">.*?</div>', '', content)
-        content = re.sub('<div class="share-links">.*?</div>', '', content)
-        content = re.sub('<div class="atclear">.*?</div>', '', content)
-        content = re.sub('<div class="addthis_toolbox">.*?</div>', '', content)
-        content = re.sub('<figure class="wp-block-image size-large">.*?</figure>', '', content)
-
-        # remove html tags
-        cleanr = re.compile('<.*?>')
-        content = re.sub(cleanr, '', content)
-        
+        content_root = content_nodes[0].root
+        if isinstance(content_root, str):
+            # ::text / ::attr() selectors
+            content_root = None
+            content = self.cleanMe(re.sub('<ul class="breadcrumb">.*?</ul>', '', content), self.get_domain_from_url(url))
+        else:
+            content = self.cleanMe(self.get_content_tree(content_root), self.get_domain_from_url(url))
 
-        content = re.sub('Facebook Twitter LinkedIn Whatsapp Share via Email Print', '', content)
+        # remove html tags / share bars left in the text
+        content = self.boilerplate.clean_text(content)
         # print(content)
 
         lang = model['lang']
@@ -807,18 +1613,18 @@ class ActuClass:
 
         # Add image_name
         image_url = ''
+        image_headers = None
         # print('image_url')
         if (single_image):
-            image_url = selector.css(single_image).get() if single_image else False
+            image_url = plan.select('single_image', selector).get() if single_image else False
         if (not image_url and image and (not image == '')):
             image_url = image
         # print(image_url)
         # Default to 'og:image'
         if (not image_url):
-            soup = BeautifulSoup(req.text, "lxml")
-            tmp = soup.find("meta",  property="og:image")
+            tmp = self.get_meta_content(selector, 'og:image')
             if tmp:
-                image_url = tmp['content']
+                image_url = tmp
         # print(image_url)
 
         
@@ -848,7 +1654,8 @@ class ActuClass:
             self._all_image_urls.append(image_url)
             
             if self._should_save_image:
-                downloaded = self.download_file(image_url, local_file, overwrite=False)
+                # keep the response headers for the published_at fallback (no second request)
+                downloaded, image_headers = self.download_image(image_url, local_file)
                 if downloaded:
                     passed = self.filter_cover_image(local_file)
                     if passed:
@@ -859,7 +1666,7 @@ class ActuClass:
 
         if apply_url:
             # print(selector.css(apply_url).get())
-            apply_url = selector.css(apply_url) if apply_url else False
+            apply_url = plan.select('apply_url', selector) if apply_url else False
             if apply_url and len(apply_url) > 0:
                 if isinstance(apply_url, list):
                     apply_url = apply_url.pop()
@@ -870,7 +1677,7 @@ class ActuClass:
 
         # try and guess deadline Url
         if 'guess_apply_url_last_url' in model and model['guess_apply_url_last_url'] == True and (not new['apply_url'] or new['apply_url'] == '') and 'content_html' in new and new['content_html']:
-            all_urls = self.extract_urls_html(new['content_html'])
+            all_urls = self.extract_urls_html(content_root if content_root is not None else new['content_html'])
             # print('guessing...')
             if all_urls and len(all_urls) > 0:
                 all_urls = [u for u in all_urls if not 'www.addtoany.com' in u]
@@ -878,28 +1685,13 @@ class ActuClass:
                     new['apply_url'] = all_urls.pop()
         
 
+        # raw dates are parsed in bulk once the batches are extracted (see parse_posts_dates)
+        date_formats = {}
         if deadline:
             new['deadline'] = new['deadline'].replace('deadline:', '')
             new['deadline'] = deadline.rjust(8, '0')
             if ('deadline_format' in model and model['deadline_format']):
-                deadline = self.cleanDate(new['deadline'], model['batch_id'])
-                try:
-                    dtmp = datetime.datetime.strptime(new['deadline'], model['deadline_format'])
-                except:
-                    try:
-                        dtmp = self.cleanDate(new['deadline'], model['batch_id'])
-                        # print('dtmp')
-                        # print(dtmp)
-                        dtmp = datetime.datetime.strptime(dtmp, model['deadline_format'])
-                    except:
-                        dtmp = False
-                        if self._debug_mode:
-                            print('Date extract Trial 2 failed (deadline) !')
-                            print(new['deadline'])
-                            print(dtmp)
-                            print('------')
-                if dtmp:
-                    new['deadline'] = dtmp.strftime('%Y-%m-%d 23:59:00')
+                date_formats['deadline'] = model['deadline_format']
         
         # print('deadline')
         # print(new['deadline'])
@@ -920,28 +1712,7 @@ class ActuClass:
                     new['published_at'] = date.rjust(8, '0')
                     # refs: http://strftime.org/
                     if ('single_date_format' in model and model['single_date_format']):
-                        # print('---------')
-                        # print(url)
-                        # print(new['published_at'])
-                        try:
-                            date = self.cleanDate(new['published_at'], model['batch_id'])
-                            dtmp = datetime.datetime.strptime(new['published_at'], model['single_date_format'])
-                        except:
-                            try:
-                                dtmp = self.cleanDate(new['published_at'], model['batch_id'])
-                                # print('dtmp')
-                                # print(dtmp)
-                                dtmp = datetime.datetime.strptime(dtmp, model['single_date_format'])
-
-                            except:
-                                dtmp = False
-                                if self._debug_mode:
-                                    print('Date extract Trial 2 failed (published_at) !')
-                                    print(new['published_at'])
-
-                        if dtmp:
-                            # Desired date format
-                            new['published_at'] = dtmp.strftime('%Y-%m-%d 08:00:00')
+                        date_formats['published_at'] = model['single_date_format']
                     # print('---------')
         
 
@@ -953,28 +1724,18 @@ class ActuClass:
         if ((not new['published_at'] or new['published_at'] == '') and image_url):
             # print(image_url)
             try:
-                # extract from image EXIF
-                r = urllib.request.Request(image_url)
-                r.add_header("user-agent", self._headers["user-agent"])
-                with urllib.request.urlopen(r) as f:
-                    dtmp = False
-                    # print(f.getheaders())
-                    try:
-                        hkeys = dict(f.getheaders())
-                        if ('date' in hkeys):
-                            dtmp = dict(f.getheaders())['date']
-                        if ('Date' in hkeys):
-                            dtmp = dict(f.getheaders())['Date']
-                        if ('last-modified' in hkeys):
-                            dtmp = dict(f.getheaders())['last-modified']
-                        if ('Last-Modified' in hkeys):
-                            dtmp = dict(f.getheaders())['Last-Modified']
-                    except:
-                        dtmp = False
+                # extract from image headers (download response, else a HEAD request)
+                if image_headers is None:
+                    image_headers = self.get_image_headers(image_url)
+                dtmp = False
+                if image_headers:
+                    dtmp = image_headers.get('Last-Modified') or image_headers.get('Date')
+                if dtmp:
+                    dtmp = parser.parse(dtmp)
                     if dtmp:
-                        dtmp = parser.parse(dtmp)
-                        if dtmp:
-                            new['published_at'] = dtmp.strftime('%Y-%m-%d 08:00:00')
+                        new['published_at'] = dtmp.strftime('%Y-%m-%d 08:00:00')
+                if not image_headers:
+                    print("Can't check exif for this file (", image_url, ")")
             except:
                 print("Can't check exif for this file (", image_url, ")")
         
@@ -1033,9 +1794,9 @@ class ActuClass:
         hasDocument = bool (model and 'document_url' in model and model['document_url'])
         if hasDocument:
             document_url = model['document_url'] if 'document_url' in model and model['document_url'] else False
-            pdf_url = selector.css(document_url).get() if document_url else False
+            pdf_url = plan.select('document_url', selector).get() if document_url else False
             document_title = model['document_title'] if 'document_title' in model and model['document_title'] else False
-            pdf_title = selector.css(document_title).get() if document_title else False
+            pdf_title = plan.select('document_title', selector).get() if document_title else False
             pdf_file_name = False
             pdf_file_extension = False
             if pdf_url:
@@ -1055,10 +1816,11 @@ class ActuClass:
 
         if 'igppp.tn' in hst:
             # define correct date for igppp
-            soup = BeautifulSoup(req.text, "lxml")
-            tmp = soup.find("meta",  property="og:updated_time")
-            tmp = parser.parse(str(tmp['content']))
-            new['published_at'] = tmp.strftime("%Y-%m-%d %H:%M:%S")
+            tmp = self.get_meta_content(selector, 'og:updated_time')
+            if tmp:
+                tmp = parser.parse(str(tmp))
+                new['published_at'] = tmp.strftime("%Y-%m-%d %H:%M:%S")
+                date_formats.pop('published_at', None)
 
 
         if 'intes.rnu.tn' in hst:
@@ -1085,227 +1847,28 @@ class ActuClass:
             #     print(parsed.date())
             #     exit()
         
+        if date_formats:
+            new['_date_formats'] = dict(date_formats, batch_id=model['batch_id'])
+
         # print(new['published_at'])
         
         return new
 
     def cleanDate(self, date, current_batch=False):
-        cleanr = re.compile('<.*?>')
-        date = re.sub(cleanr, '', date)
-        date = date.replace(',', '')
-        date = date.replace(',', '')
-        date = date.replace(',', '')
-        date = date.replace('،', '')
-        date = date.replace('◔', '')
-        date = date.replace('تاريخ النشر: ', '')
-        date = date.replace('Date de création: ', '')
-
-        date = re.sub(r"\s+", "", date, flags=re.UNICODE)
-        date = date.lower()
-        date = date.strip()
-        # remove day names
-        date = date.replace('dimanche', '')
-        date = date.replace('lundi', '')
-        date = date.replace('mardi', '')
-        date = date.replace('mercredi', '')
-        date = date.replace('jeudi', '')
-        date = date.replace('vendredi', '')
-        date = date.replace('samedi', '')
-        date = date.replace('الأحد', '')
-        date = date.replace('الإثنين', '')
-        date = date.replace('الاثنين', '')
-        date = date.replace('الثلاثاء', '')
-        date = date.replace('الأربعاء', '')
-        date = date.replace('الخميس', '')
-        date = date.replace('الجمعة', '')
-        date = date.replace('السبت', '')
-
-        date = date.replace('janvier', '01')
-        date = date.replace('january', '01')
-        date = date.replace('jan', '01')
-        date = date.replace('février', '02')
-        date = date.replace('fevrier', '02')
-        date = date.replace('fév', '02')
-        date = date.replace('fev', '02')
-        date = date.replace('february', '02')
-        date = date.replace('feb', '02')
-        date = date.replace('mars', '03')
-        date = date.replace('march', '03')
-        date = date.replace('mar', '03')
-        date = date.replace('avril', '04')
-        date = date.replace('april', '04')
-        date = date.replace('avr', '04')
-        date = date.replace('apr', '04')
-        date = date.replace('mai', '05')
-        date = date.replace('may', '05')
-        date = date.replace('juin', '06')
-        date = date.replace('june', '06')
-        date = date.replace('jun', '06')
-        date = date.replace('juillet', '07')
-        date = date.replace('juil', '07')
-        date = date.replace('july', '07')
-        date = date.replace('jul', '07')
-        date = date.replace('august', '08')
-        date = date.replace('août', '08')
-        date = date.replace('aout', '08')
-        date = date.replace('aoû', '08')
-        date = date.replace('aou', '08')
-        date = date.replace('aug', '08')
-        date = date.replace('septembre', '09')
-        date = date.replace('september', '09')
-        date = date.replace('sept', '09')
-        date = date.replace('sep', '09')
-        date = date.replace('octobre', '10')
-        date = date.replace('october', '10')
-        date = date.replace('oct', '10')
-        date = date.replace('novembre', '11')
-        date = date.replace('november', '11')
-        date = date.replace('nov', '11')
-        date = date.replace('décembre', '12')
-        date = date.replace('decembre', '12')
-        date = date.replace('december', '12')
-        date = date.replace('décember', '12')
-        date = date.replace('déc', '12')
-        date = date.replace('dec', '12')
-
-
-        date = date.replace('جانفي', '01')
-        date = date.replace('فيفري', '02')
-        date = date.replace('مارس', '03')
-        date = date.replace('أفريل', '04')
-        date = date.replace('أبريل', '04')
-        date = date.replace('مايو', '05')
-        date = date.replace('مايو', '05')
-        date = date.replace('ماي', '05')
-        date = date.replace('جوان', '06')
-        date = date.replace('جويلية', '07')
-        date = date.replace('أوت', '08')
-        date = date.replace('اوت', '08')
-        date = date.replace('سبتمبر', '09')
-        date = date.replace('أكتوير', '10')
-        date = date.replace('أكتوبر', '10')
-        date = date.replace('نوفمبر', '11')
-        date = date.replace('ديسمبر', '12')
-        date = date.replace('يناير', '01')
-        date = date.replace('فبراير', '02')
-        date = date.replace('مارس', '03')
-        date = date.replace('ابريل', '04')
-        date = date.replace('يونيو', '06')
-        date = date.replace('يوليوز', '07')
-        date = date.replace('يوليو', '07')
-        date = date.replace('اغسطس', '08')
-        date = date.replace('أغسطس', '08')
-        date = date.replace('شتنبر', '09')
-        date = date.replace('أكتوبر', '10')
-        date = date.replace('نونبر', '11')
-        date = date.replace('دجنبر', '12')
-
-        # Il y a (jamaity) - deadline
-        if 'ilya' in date:
-            date = date.split('ilya')[0]
-
-        # Min culture exception
-        cultureBatches = [
-            'minis-culture',
-            'minis-culture-news-ar',
-            'minis-culture-actions-ar',
-            'minis-culture-activites-fr'
-        ]
-        # print('date')
-        # print(current_batch)
-        # print(date)
-        if current_batch in cultureBatches and len(date) == 7:
-            # print('changed')
-            date = date[:2] + '0' + date[2:]
-        # print(date)
-        # print('------')
+        """
+        Returns date normalised for strptime (see DateNormalizerClass, memoized per batch)
+        """
+        return self.date_normalizer.normalize(date, current_batch)
 
-        if len(date) == 7:
-            date = '0' + str(date)
-    
-    
-        # Min affaires Sociale exception
-        if date.endswith('-12:00'):
-            date = date.replace('-12:00', '')
-            date = date.strip()
-            # adjust issue with Min affaires Sociale
-            if len(date) == 7:
-                # insert zero after month value
-                date = date[:2] + '0' + date[2:]
-
-        # Tunisiair exception
-        if date.endswith(':'):
-            date = date[:len(date)-1]
-        
-        if current_batch == 'contemporaryand' and '-' in date:
-            date = date[len(date)-1]
-
-        date = date.strip()
-        date = date.strip('-')
-        date = date.replace('misàjourle', '')
-
-        return date
-
-    def cleanMe(self, html):
-        # create a new bs4 object from the html data loaded
-        soup = BeautifulSoup(html, "html.parser")
-        # remove all javascript and stylesheet code
-        for script in soup(["script", "style"]):
-            script.extract()
-
-        removals = soup.find_all('ul', {'class': 'breadcrumb'})
-        for match in removals:
-            match.decompose()
-        removals = soup.find_all('div', {'class': 'post-meta'})
-        for match in removals:
-            match.decompose()
-        removals = soup.find_all('div', {'class': 'addtoany_share_save_container addtoany_content addtoany_content_top'})
-        for match in removals:
-            match.decompose()
-        removals = soup.find_all('div', {'class': 'news-single-backlink'})
-        for match in removals:
-            match.decompose()
-        removals = soup.find_all('div', {'class': 'post-footer'})
-        for match in removals:
-            match.decompose()
-        removals = soup.find_all('ul', {'class': 'metas'})
-        for match in removals:
-            match.decompose()
-        removals = soup.find_all('div', {'class': 'shareBar'})
-        for match in removals:
-            match.decompose()
-        removals = soup.find_all('div', {'class': 'article-comments'})
-        for match in removals:
-            match.decompose()
-        removals = soup.find_all('div', {'class': 'news__image col-sm-6'})
-        for match in removals:
-            match.decompose()
-        removals = soup.find_all('span', {'class': 'reforme_date'})
-        for match in removals:
-            match.decompose()
-        removals = soup.find_all('ul', {'class': 'joomla_add_this'})
-        for match in removals:
-            match.decompose()
-        removals = soup.find_all('div', {'class': 'addthis_inline_share_toolbox'})
-        for match in removals:
-            match.decompose()
-        removals = soup.find_all('div', {'class': 'ssba ssba-wrap'})
-        for match in removals:
-            match.decompose()
-        removals = soup.find_all('div', {'class': 'btn-flip-container'})
-        for match in removals:
-            match.decompose()
-        removals = soup.find_all('div', {'class': 'cmsImg'})
-        for match in removals:
-            match.decompose()
-        removals = soup.find_all('div', {'class': 'cmsDate'})
-        for match in removals:
-            match.decompose()
-        removals = soup.find_all('div', {'class': 'outils1'})
-        for match in removals:
-            match.decompose()
+    def cleanMe(self, html, domain=''):
+        """
+        Returns the text of html (string or lxml element, modified in place) without scripts, styles and boilerplate blocks (see BoilerplateClass)
+        """
+        tree = self.get_html_tree(html)
+        if not self.boilerplate.remove(tree, domain):
+            return ''
         # get text
-        text = soup.get_text()
+        text = ''.join(tree.itertext())
         # break into lines and remove leading and trailing space on each
         lines = (line.strip() for line in text.splitlines())
         # break multi-headlines into a line each
@@ -1314,10 +1877,31 @@ class ActuClass:
         text = '\n'.join(chunk for chunk in chunks if chunk)
         return text
 
+    def get_image_headers(self, image_url):
+        """
+        Returns the response headers of image_url without downloading it (None on error)
+        """
+        try:
+            r = self.http_request('HEAD', image_url, headers=self._headers, allow_redirects=True, verify=False)
+            if not r.ok:
+                # HEAD not supported: read the headers only
+                r = self.http_request('GET', image_url, headers=self._headers, allow_redirects=True, verify=False, stream=True)
+                r.close()
+        except:
+            return None
+        return r.headers if r.ok else None
+
     def download_file(self, remote_file, local_file, overwrite=False):
+        return self.download_image(remote_file, local_file)[0]
+
+    def download_image(self, remote_file, local_file):
+        """
+        Returns (downloaded, response headers) - headers are None when nothing was requested, False on error
+        """
         if (not self.is_file_exists(local_file) and not self.is_file_exists(local_file.lower())):
             try:
-                r = self.get_session().get(remote_file, headers=self._headers, allow_redirects=True, verify=False)
+                r = self.http_request('GET', remote_file, headers=self._headers, allow_redirects=True, verify=False, timeout=self.get_timeout(remote_file))
+                headers = r.headers if r.ok else False
                 # prevent a 404 error page (html string format) - if correct, the result would be a byte
                 try:
                     isString = r.content.decode('utf-8')
@@ -1328,13 +1912,13 @@ class ActuClass:
                 # if not '<html>' in r.content.decode('utf-8'):
                     with open(local_file.lower(), 'wb') as f:
                         f.write(r.content)
-                        return True
+                        return True, headers
                 else:
                     print("Downloaded file issue (", remote_file.strip(), ")")
-                    return False
+                    return False, headers
             except:
                 print("Can't download this file (", remote_file.strip(), ")")
-                return False
+                return False, None
         else:
             print('File already exists: ', local_file)
-            return True
+            return True, None
@@ -15,6 +15,7 @@ from typing import List
 import pandas as pd
 import streamlit as st
 
+from parquet_utils import PostsParquetClass
 from semantic_search import SemanticSearch
 
 st.set_page_config(page_title="CSV Semantic Search", layout="wide")
@@ -25,7 +26,7 @@ st.markdown(
 )
 
 uploaded = st.file_uploader(
-    "Upload CSV file(s)", type=["csv"], accept_multiple_files=True
+    "Upload CSV file(s)", type=["csv", "parquet"], accept_multiple_files=True
 )
 
 # uploaded = [
@@ -38,7 +39,10 @@ if uploaded:
     for f in uploaded:
         # Reset pointer & get bytes
         bytes_data = f.read()
-        df = pd.read_csv(io.StringIO(bytes_data.decode("utf-8")))
+        if f.name.endswith(".parquet"):
+            df = PostsParquetClass().read(io.BytesIO(bytes_data), as_text=True)
+        else:
+            df = pd.read_csv(io.StringIO(bytes_data.decode("utf-8")))
         dfs.append(df)
 
     # Build the searcher lazily (outside the loop to avoid re‑encoding)
@@ -0,0 +1,995 @@
+# coding: utf8
+#!/usr/bin/python
+'''
+# Local benchmark: run the full ActuClass pipeline against mock sites built from cfw-configs/samples
+
+python bench_ultscan.py --latency=0.05 --jitter=0.02 --error-rate=0.01
+python bench_ultscan.py --async-engine --max-concurrency=16 --repeat=2 --http-cache
+python bench_ultscan.py --mode=parse --repeat=20
+python bench_ultscan.py --mode=boilerplate
+python bench_ultscan.py --mode=dates --repeat=20
+python bench_ultscan.py --mode=listing --repeat=50
+python bench_ultscan.py --mode=decode --repeat=20
+python bench_ultscan.py --listing-parse-mode=region
+python bench_ultscan.py --repeat=2 --keep-history
+python bench_ultscan.py --repeat=2 --keep-history --state-db
+python bench_ultscan.py --repeat=2 --keep-history --url-index
+python bench_ultscan.py --mode=history --history-size=1000000
+python bench_ultscan.py --mode=compaction --history-size=10000 --repeat=8
+python bench_ultscan.py --mode=exports --export-size=20000 --latency=0
+'''
+import argparse
+import contextlib
+import copy
+import csv
+import datetime
+import glob
+import hashlib
+import io
+import os
+import random
+import re
+import resource
+import shutil
+import tempfile
+import threading
+import time
+import tracemalloc
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import quote
+
+import htmlmin
+import numpy as np
+import pandas as pd
+from bs4 import BeautifulSoup
+from parsel import Selector
+
+from actu_class import ActuClass
+from date_utils import DateNormalizerClass
+from fingerprint_index import FingerprintIndexClass
+from history_log import HistoryLogClass
+from url_index import ProcessedUrlIndexClass
+
+
+current_script_path = os.path.dirname(os.path.abspath(__file__))
+samples_dir = os.path.join(current_script_path, 'cfw-configs', 'samples')
+
+# one mock site per sample couple (listing page + detail page)
+SITES = {
+    'fundsforngos': {
+        'listing': 'fundsforngos-pagination.html',
+        'single': 'fundsforngos-single.html',
+        'origin': 'https://www2.fundsforngos.org/',
+        'model': {
+            "rubrique_website": "opportunities",
+            "themes": "",
+            "lang": "EN",
+            "reg_ul": "main#genesis-content",
+            "reg_li": "article.post",
+            "reg_li_a": "header.entry-header h4.entry-title a",
+            "reg_li_title": "header.entry-header h4.entry-title a::text",
+            "reg_li_date": False,
+            "reg_li_image": "img.entry-image::attr(src)",
+            "single_title": "h1.entry-title::text",
+            "single_content": "main#genesis-content article.post",
+            "single_image": "img.entry-image::attr(src)",
+            "single_date": "meta[property='article:published_time']::attr(content)",
+            "single_date_format": "%Y-%m-%dT%H:%M:%S%z",
+            "apply_url": "div.entry-content a:last-child::attr(href)",
+            "guess_apply_url_last_url": False,
+        },
+    },
+    'opportunitiesforafricans': {
+        'listing': 'opportunitiesforafricans-cfa-index.html',
+        'single': 'opportunitiesforafricans-cfa-single.html',
+        'origin': 'https://www.opportunitiesforafricans.com/',
+        'model': {
+            "rubrique_website": "opportunities",
+            "themes": "",
+            "lang": "EN",
+            "reg_ul": "#main",
+            "reg_li": "article.post",
+            "reg_li_a": "h2.entry-title a",
+            "reg_li_title": "h2.entry-title a::text",
+            "reg_li_date": False,
+            "reg_li_image": False,
+            "single_title": "h1.entry-title::text",
+            "single_content": ".entry-content",
+            "single_image": False,
+            "single_date": ".post-box-meta-single time::attr(datetime)",
+            "single_date_format": "%Y-%m-%dT%H:%M:%S%z",
+            "apply_url": False,
+            "guess_apply_url_last_url": True,
+        },
+    },
+}
+
+EMPTY_PAGE = b'<html><body></body></html>'
+# 1x1 transparent gif
+PIXEL = b'GIF89a\x01\x00\x01\x00\x80\x00\x00\x00\x00\x00\x00\x00\x00!\xf9\x04\x01\x00\x00\x00\x00,\x00\x00\x00\x00\x01\x00\x01\x00\x00\x02\x02D\x01\x00;'
+
+
+class MockSiteServer:
+    """
+    Serves every site of SITES on 127.0.0.1 (listing pages /<site>/page/N/, detail pages, images)
+    """
+    def __init__(self, *, pages=3, latency=0.0, jitter=0.0, error_rate=0.0, seed=0):
+        self.pages = pages
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+        self.bodies = {}
+        for site, conf in SITES.items():
+            for kind in ('listing', 'single'):
+                with open(os.path.join(samples_dir, conf[kind]), encoding='utf-8') as f:
+                    html = f.read()
+                # absolute links of the real site become local (relative) links
+                self.bodies[(site, kind)] = html.replace(conf['origin'], '/' + site + '/')
+
+        server = self
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+            def do_HEAD(self):
+                server.handle(self, head=True)
+            def do_GET(self):
+                server.handle(self)
+
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.httpd.daemon_threads = True
+        self.port = self.httpd.server_address[1]
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    def get_url(self, path=''):
+        return 'http://127.0.0.1:' + str(self.port) + '/' + path
+
+    def get_body(self, path):
+        """
+        Returns (status, content type, body) of path
+        """
+        if re.search(r'\.(png|jpe?g|gif|webp|svg)$', path, re.I):
+            return 200, 'image/gif', PIXEL
+        parts = path.strip('/').split('/')
+        site = parts[0]
+        if not site in SITES:
+            return 404, 'text/html', EMPTY_PAGE
+        m = re.match(r'^/[^/]+/page/(\d+)/$', path)
+        if m:
+            n = int(m.group(1))
+            if n > self.pages:
+                return 200, 'text/html; charset=UTF-8', EMPTY_PAGE
+            # every listing page links to its own detail urls
+            html = self.bodies[(site, 'listing')].replace('/' + site + '/', '/' + site + '/p' + str(n) + '/')
+            return 200, 'text/html; charset=UTF-8', html.encode('utf-8')
+        return 200, 'text/html; charset=UTF-8', self.bodies[(site, 'single')].encode('utf-8')
+
+    def handle(self, handler, head=False):
+        with self.lock:
+            self.requests += 1
+            delay = max(0.0, self.latency + self.random.uniform(-self.jitter, self.jitter))
+            failed = self.random.random() < self.error_rate
+            if failed:
+                self.errors += 1
+        if delay:
+            time.sleep(delay)
+        if failed:
+            handler.send_response(503)
+            handler.send_header('Content-Length', '0')
+            handler.end_headers()
+            return
+
+        status, content_type, body = self.get_body(handler.path.split('?')[0])
+        etag = '"' + hashlib.md5(body).hexdigest() + '"'
+        if status == 200 and handler.headers.get('If-None-Match') == etag:
+            handler.send_response(304)
+            handler.send_header('ETag', etag)
+            handler.end_headers()
+            return
+        handler.send_response(status)
+        handler.send_header('Content-Type', content_type)
+        handler.send_header('Content-Length', str(len(body)))
+        handler.send_header('ETag', etag)
+        handler.end_headers()
+        if not head:
+            handler.wfile.write(body)
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def get_post_models(base_url, pages):
+    models = []
+    for site, conf in SITES.items():
+        model = {
+            "batch_id": site,
+            "orgs": "",
+            "default_pagination_limit": "",
+            "loop_mode": "number_increase",
+            "loop_start": 1,
+            "loop_step": 1,
+            "loop_end": pages + 1,
+            "page_actu_home": base_url + site + '/',
+            "page_actu_loop": base_url + site + '/page/ACTU_NBR/',
+            "single_tags": False,
+            "deadline": False,
+            "deadline_format": False,
+            "eligibility_criteria": False,
+            "document_url": False,
+            "document_title": False,
+        }
+        model.update(conf['model'])
+        models.append(model)
+    return models
+
+def prepare_config_dir(config_dir, models):
+    """
+    Fresh history + the matcher dictionaries: every run extracts the same posts
+    """
+    os.makedirs(config_dir + '/posts/', exist_ok=True)
+    os.makedirs(config_dir + '/images/', exist_ok=True)
+    for f in ['governorates_with_alts.csv', 'organizations.csv']:
+        shutil.copy(os.path.join(current_script_path, 'cfw-configs', f), config_dir)
+    pd.DataFrame(models).to_csv(config_dir + '/post_models.csv', index=None)
+    for f in ['processed_posts_urls.csv', 'processed_images_urls.csv', 'processed_publications_urls.csv']:
+        open(config_dir + '/' + f, 'w').close()
+    for f in ['state.db', 'state.db-wal', 'state.db-shm', 'processed_posts_urls.fp']:
+        if os.path.exists(config_dir + '/' + f):
+            os.remove(config_dir + '/' + f)
+
+def get_percentile(values, percentile):
+    if not values:
+        return 0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(percentile * len(values)))]
+
+def get_actu(config_dir, actu_params, verbose=False):
+    output = None if verbose else io.StringIO()
+    actu_params = dict(actu_params)
+    if actu_params.pop('use_state_db', False):
+        actu_params['state_db'] = config_dir + '/state.db'
+    if actu_params.pop('use_url_index', False):
+        actu_params['url_index_file'] = config_dir + '/processed_posts_urls.fp'
+    with contextlib.redirect_stdout(output) if output else contextlib.nullcontext():
+        return ActuClass(
+            config_dir=config_dir,
+            db_post_models_csv=config_dir + '/post_models.csv',
+            db_already_processed_posts_csv=config_dir + '/processed_posts_urls.csv',
+            db_already_processed_images_csv=config_dir + '/processed_images_urls.csv',
+            db_already_processed_publications_csv=config_dir + '/processed_publications_urls.csv',
+            db_storage_csv=config_dir + '/posts/',
+            db_storage_image=config_dir + '/images/',
+            should_save_image=False,
+            **actu_params
+        )
+
+def run_pipeline(config_dir, actu_params, verbose=False, save_history=False):
+    """
+    Returns (posts, elapsed seconds, fetch latencies) of one ActuClass run (save_history: keep the processed urls for the next run)
+    """
+    actu = get_actu(config_dir, actu_params, verbose)
+
+    # time every request sent by the pipeline
+    latencies = []
+    http_request = actu.http_request
+    def timed_http_request(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return http_request(*args, **kwargs)
+        finally:
+            latencies.append(time.perf_counter() - start)
+    actu.http_request = timed_http_request
+
+    output = None if verbose else io.StringIO()
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(output) if output else contextlib.nullcontext():
+        posts = actu.extract_new_posts()
+    elapsed = time.perf_counter() - start
+    if save_history:
+        with contextlib.redirect_stdout(output) if output else contextlib.nullcontext():
+            actu.save_already_processed_items()
+    return posts, elapsed, latencies
+
+def print_report(label, server_requests, posts, elapsed, latencies):
+    print('#######################################')
+    print(label)
+    print('# Posts: ' + str(len(posts)) + ' (' + str(round(len(posts) / elapsed, 2)) + ' posts/s)')
+    print('# Requests: ' + str(server_requests) + ' (' + str(round(server_requests / elapsed, 2)) + ' req/s)')
+    print('# Fetch latency: p50 ' + str(round(get_percentile(latencies, 0.5) * 1000, 1)) + ' ms / p95 ' + str(round(get_percentile(latencies, 0.95) * 1000, 1)) + ' ms')
+    print('# Elapsed: ' + str(round(elapsed, 2)) + ' s')
+    # ru_maxrss is in KB on linux
+    print('# Peak RSS: ' + str(round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)) + ' MB')
+
+
+
+# reference implementations (before the detail page was parsed once)
+LEGACY_BOILERPLATE = [
+    ('ul', 'breadcrumb'),
+    ('div', 'post-meta'),
+    ('div', 'addtoany_share_save_container addtoany_content addtoany_content_top'),
+    ('div', 'news-single-backlink'),
+    ('div', 'post-footer'),
+    ('ul', 'metas'),
+    ('div', 'shareBar'),
+    ('div', 'article-comments'),
+    ('div', 'news__image col-sm-6'),
+    ('span', 'reforme_date'),
+    ('ul', 'joomla_add_this'),
+    ('div', 'addthis_inline_share_toolbox'),
+    ('div', 'ssba ssba-wrap'),
+    ('div', 'btn-flip-container'),
+    ('div', 'cmsImg'),
+    ('div', 'cmsDate'),
+    ('div', 'outils1'),
+]
+
+def legacy_clean_me(html):
+    soup = BeautifulSoup(html, "html.parser")
+    for script in soup(["script", "style"]):
+        script.extract()
+    for tag, class_name in LEGACY_BOILERPLATE:
+        for match in soup.find_all(tag, {'class': class_name}):
+            match.decompose()
+    text = soup.get_text()
+    lines = (line.strip() for line in text.splitlines())
+    chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
+    return '\n'.join(chunk for chunk in chunks if chunk)
+
+def legacy_extract_urls_html(html):
+    soup = BeautifulSoup(html, 'html.parser')
+    return [str(link.get('href')) for link in soup.find_all('a') if link.get('href') != '#']
+
+def legacy_parse_detail(html, model):
+    selector = Selector(text=html)
+    content = selector.css(model['single_content']).get()
+    content = content.replace(' ', ' ').replace('  ', ' ')
+    content_html = htmlmin.minify(content, remove_comments=True, remove_empty_space=True)
+    tmp = BeautifulSoup(html, "lxml").find("meta", property="og:image")
+    image_url = tmp['content'] if tmp else None
+    text = legacy_clean_me(re.sub('<ul class="breadcrumb">.*?</ul>', '', content))
+    return text, legacy_extract_urls_html(content_html), image_url
+
+def parse_detail(actu, html, model):
+    selector = Selector(text=html)
+    content = selector.css(model['single_content']).get()
+    content = content.replace(' ', ' ').replace('  ', ' ')
+    htmlmin.minify(content, remove_comments=True, remove_empty_space=True)
+    image_url = actu.get_meta_content(selector, 'og:image')
+    content_root = selector.css(model['single_content'])[0].root
+    text = actu.cleanMe(actu.get_content_tree(content_root))
+    return text, actu.extract_urls_html(content_root), image_url
+
+def legacy_clean_content(content):
+    """
+    Text of a content fragment as get_actu_from_link cleaned it before the boilerplate engine
+    """
+    content = content.replace(' ', ' ').replace('  ', ' ')
+    content = re.sub('<ul class="breadcrumb">.*?</ul>', '', content)
+    content = legacy_clean_me(content)
+    content = re.sub('<div class="addthis_inline_share_toolbox".*?</ul>', '', content)
+    content = re.sub('<div class="mainFig">.*?</div>', '', content)
+    content = re.sub('<div class="share-links">.*?</div>', '', content)
+    content = re.sub('<div class="atclear">.*?</div>', '', content)
+    content = re.sub('<div class="addthis_toolbox">.*?</div>', '', content)
+    content = re.sub('<figure class="wp-block-image size-large">.*?</figure>', '', content)
+    content = re.sub(re.compile('<.*?>'), '', content)
+    return re.sub('Facebook Twitter LinkedIn Whatsapp Share via Email Print', '', content)
+
+def clean_content(actu, element):
+    return actu.boilerplate.clean_text(actu.cleanMe(actu.get_content_tree(element)))
+
+def bench_boilerplate(actu, repeat):
+    """
+    Equivalence (and CPU time) of the boilerplate engine vs the former cleanMe + regexes,
+    on the body and every div / article / main / ul of the sample pages
+    """
+    mismatches = 0
+    for sample in sorted(os.listdir(samples_dir)):
+        with open(os.path.join(samples_dir, sample), encoding='utf-8') as f:
+            selector = Selector(text=f.read())
+        elements = selector.css('body, main, article, div, ul')
+        same = 0
+        for element in elements:
+            if legacy_clean_content(element.get()) == clean_content(actu, element.root):
+                same += 1
+            else:
+                mismatches += 1
+                print('MISMATCH: ' + sample + ' ' + element.root.tag + ' ' + str(element.attrib))
+
+        body = selector.css('body')[0]
+        timings = {}
+        for label, clean in [('legacy', lambda: legacy_clean_content(body.get())), ('single pass', lambda: clean_content(actu, body.root))]:
+            start = time.process_time()
+            for i in range(repeat):
+                clean()
+            timings[label] = (time.process_time() - start) / repeat
+        print('#######################################')
+        print(sample + ': ' + str(same) + ' / ' + str(len(elements)) + ' fragments identical')
+        for label, timing in timings.items():
+            print('# ' + label + ' (body): ' + str(round(timing * 1000, 1)) + ' ms CPU')
+    return mismatches == 0
+
+def bench_listing(actu, repeat):
+    """
+    Listing pages parsed whole vs up to their reg_ul container (listing_parse_mode = region): same articles and CPU time
+    """
+    mismatches = 0
+    for model in get_post_models('http://127.0.0.1/', 1):
+        with open(os.path.join(samples_dir, SITES[model['batch_id']]['listing']), encoding='utf-8') as f:
+            html = f.read()
+        region_model = dict(model, batch_id=model['batch_id'] + '-region', listing_parse_mode='region')
+        articles = actu.get_actu_articles_from_page(html, model)
+        region_articles = actu.get_actu_articles_from_page(html, region_model)
+        if articles != region_articles:
+            mismatches += 1
+            print('MISMATCH: ' + model['batch_id'])
+        timings = {}
+        for label, parse_model in [('whole page', model), ('region', region_model)]:
+            start = time.process_time()
+            for i in range(repeat):
+                actu.get_actu_articles_from_page(html, parse_model)
+            timings[label] = (time.process_time() - start) / repeat
+        print('#######################################')
+        print(model['batch_id'] + ': ' + str(len(articles or [])) + ' articles, ' + ('identical' if articles == region_articles else 'different'))
+        for label, timing in timings.items():
+            print('# ' + label + ': ' + str(round(timing * 1000, 2)) + ' ms CPU / page')
+    return mismatches == 0
+
+def bench_decode(actu, repeat):
+    """
+    Pages parsed from the response bytes vs decoded to utf-8 text first (same tree, CPU time, peak memory),
+    and a windows-1256 page read with its own charset
+    """
+    mismatches = 0
+    for sample in sorted(os.listdir(samples_dir)):
+        with open(os.path.join(samples_dir, sample), 'rb') as f:
+            body = f.read()
+        encoding = actu._charsets.detect(body)[0]
+        same = Selector(text=body.decode('utf-8', errors='replace')).get() == actu.get_selector(body, encoding).get()
+        mismatches += not same
+        print('#######################################')
+        print(sample + ': ' + encoding + ', ' + ('same tree' if same else 'different tree'))
+        for label, parse in [('decoded text', lambda: Selector(text=body.decode('utf-8', errors='replace'))), ('bytes', lambda: actu.get_selector(body, encoding))]:
+            start = time.process_time()
+            for i in range(repeat):
+                parse()
+            timing = (time.process_time() - start) / repeat
+            tracemalloc.start()
+            parse()
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            print('# ' + label + ': ' + str(round(timing * 1000, 2)) + ' ms CPU, ' + str(round(peak / 1024)) + ' KB peak (python allocations)')
+
+    text = 'آخر أجل لتقديم الترشحات 15 ماي 2024'
+    body = ('<html><head><meta charset="windows-1256"></head><body><h1>' + text + '</h1></body></html>').encode('cp1256')
+    encoding = actu._charsets.detect(body)[0]
+    decoded = actu.get_selector(body, encoding).css('h1::text').get()
+    print('#######################################')
+    print('windows-1256 page: ' + encoding + ', ' + ('read' if decoded == text else 'NOT read') + ' (as utf-8 text: ' + Selector(text=body.decode('utf-8', errors='replace')).css('h1::text').get()[:20] + '...)')
+    return mismatches == 0 and decoded == text
+
+def bench_compaction(config_dir, history_size, runs):
+    """
+    Size / load time of processed_publications_urls.csv over runs: whole history appended back (former save) vs run urls only + compaction
+    """
+    results = {}
+    for label in ['append history', 'append run + compact']:
+        csv_file = config_dir + '/processed_publications_urls.csv'
+        with open(csv_file, 'w') as f:
+            for i in range(history_size):
+                f.write('"https://www.example.tn/publications/' + str(i) + '.pdf"\n')
+        print('#######################################')
+        print(label)
+        for run in range(runs):
+            history = HistoryLogClass(csv_file=csv_file)
+            start = time.perf_counter()
+            urls = history.load()
+            load = time.perf_counter() - start
+            new_urls = ['https://www.example.tn/publications/run-' + str(run) + '-' + str(i) + '.pdf' for i in range(100)]
+            if label == 'append history':
+                pd.DataFrame(urls + new_urls).to_csv(csv_file, index=None, header=False, mode='a', quoting=csv.QUOTE_ALL)
+            else:
+                history.append(new_urls)
+                history.compact_if_needed()
+            print('# Run ' + str(run + 1) + ': loaded ' + str(len(urls)) + ' rows in ' + str(round(load * 1000, 1)) + ' ms, ' + str(round(os.path.getsize(csv_file) / 1024, 1)) + ' KB after save')
+        results[label] = set(HistoryLogClass(csv_file=csv_file).read())
+    same = results['append history'] == results['append run + compact']
+    print('# Same urls: ' + str(same))
+    return same
+
+def bench_exports(actu, posts, export_size, repeat):
+    """
+    posts-*.csv vs posts-*.parquet: size, full / projected loads and same posts read back by load_all_posts
+    """
+    actu._new_posts = [dict(post, slug=post['slug'] + '-' + str(i)) for i in range(export_size // max(1, len(posts)) + 1) for post in posts][:export_size]
+    with contextlib.redirect_stdout(io.StringIO()):
+        actu.save_new_items()
+    csv_file = glob.glob(os.path.join(actu._db_storage_csv, '*.csv'))[0]
+    parquet_file = csv_file[:-len('.csv')] + '.parquet'
+    columns = ['slug', 'published_at', 'langs']
+
+    loads = [
+        ('csv', lambda: pd.read_csv(csv_file).replace(np.nan, '', regex=True)),
+        ('parquet (as text)', lambda: actu._parquet.read(parquet_file, as_text=True)),
+        ('parquet (typed)', lambda: actu._parquet.read(parquet_file)),
+        ('csv ' + ','.join(columns), lambda: pd.read_csv(csv_file, usecols=columns)),
+        ('parquet ' + ','.join(columns), lambda: actu._parquet.read(parquet_file, columns=columns)),
+    ]
+    print('#######################################')
+    # the posts are repeated: the parquet size only says how well they compress
+    print(str(len(actu._new_posts)) + ' posts: csv ' + str(round(os.path.getsize(csv_file) / 1024)) + ' KB, parquet ' + str(round(os.path.getsize(parquet_file) / 1024)) + ' KB')
+    for label, load in loads:
+        start = time.perf_counter()
+        for i in range(repeat):
+            load()
+        print('# ' + label + ': ' + str(round((time.perf_counter() - start) / repeat * 1000, 1)) + ' ms')
+
+    # load_all_posts reads the parquet copy when there is one
+    from_parquet = actu.load_all_posts()
+    os.rename(parquet_file, parquet_file + '.off')
+    from_csv = actu.load_all_posts()
+    os.rename(parquet_file + '.off', parquet_file)
+    mismatches = []
+    for column in from_csv.columns:
+        if column in ['published_at', 'extracted_at', 'deadline']:
+            # parquet keeps the instant (UTC), not the offset notation
+            same = (pd.to_datetime(from_csv[column].replace('', None), utc=True, format='mixed', errors='coerce').dt.tz_convert(None).fillna(pd.Timestamp(0)).values == pd.to_datetime(from_parquet[column].replace('', None), format='mixed', errors='coerce').fillna(pd.Timestamp(0)).values).all()
+        else:
+            same = (from_csv[column].astype(str).values == from_parquet[column].astype(str).values).all()
+        if not same:
+            mismatches.append(column)
+    print('# Same posts read back: ' + str(not mismatches) + (' (' + ', '.join(mismatches) + ')' if mismatches else ''))
+    return not mismatches
+
+def bench_history(config_dir, history_size, repeat):
+    """
+    Startup time, memory and lookups of a large processed urls history: csv loaded in a set vs memory-mapped fingerprints
+    """
+    csv_file = config_dir + '/processed_posts_urls.csv'
+    # percent-encoded arabic urls, as saved by the crawler
+    slug = quote('خبر-جديد-حول-المناظرة-الوطنية')
+    with open(csv_file, 'w') as f:
+        for i in range(history_size):
+            f.write('"https://www.example.gov.tn/ar/actualites/' + slug + '-' + str(i) + '/"\n')
+    hits = ['https://www.example.gov.tn/ar/actualites/' + slug + '-' + str(i) + '/' for i in range(0, history_size, max(1, history_size // 1000))]
+    misses = ['https://www.example.gov.tn/ar/actualites/' + slug + '-new-' + str(i) + '/' for i in range(1000)]
+
+    url_index = FingerprintIndexClass(index_file=config_dir + '/processed_posts_urls.fp')
+    start = time.perf_counter()
+    url_index.build_from_csv(csv_file, ProcessedUrlIndexClass().canonical)
+    build = time.perf_counter() - start
+
+    loaders = [
+        ('csv + set', lambda: ProcessedUrlIndexClass(urls=[url for row in csv.reader(open(csv_file)) for url in row])),
+        ('url index', lambda: ProcessedUrlIndexClass(fingerprints=FingerprintIndexClass(index_file=config_dir + '/processed_posts_urls.fp'))),
+    ]
+    same = True
+    print('#######################################')
+    print(str(history_size) + ' urls (csv ' + str(round(os.path.getsize(csv_file) / 1024 / 1024, 1)) + ' MB, index ' + str(round(os.path.getsize(config_dir + '/processed_posts_urls.fp') / 1024 / 1024, 1)) + ' MB built in ' + str(round(build, 2)) + ' s)')
+    for label, load in loaders:
+        start = time.perf_counter()
+        index = load()
+        startup = time.perf_counter() - start
+        del index
+        # second load for the memory (tracemalloc slows the allocations down)
+        tracemalloc.start()
+        index = load()
+        memory = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        same = same and all(url in index for url in hits) and not any(url in index for url in misses)
+        start = time.perf_counter()
+        for i in range(repeat):
+            for url in hits + misses:
+                url in index
+        lookup = (time.perf_counter() - start) / (repeat * (len(hits) + len(misses)))
+        print('# ' + label + ': startup ' + str(round(startup * 1000, 1)) + ' ms, ' + str(round(memory / 1024 / 1024, 1)) + ' MB (python allocations), lookup ' + str(round(lookup * 1000000, 2)) + ' us')
+        del index
+    print('# Same hits / misses: ' + str(same))
+    return same
+
+# cleanDate before DateNormalizerClass (~120 chained replaces)
+def legacy_clean_date(date, current_batch=False):
+    cleanr = re.compile('<.*?>')
+    date = re.sub(cleanr, '', date)
+    date = date.replace(',', '')
+    date = date.replace(',', '')
+    date = date.replace(',', '')
+    date = date.replace('،', '')
+    date = date.replace('◔', '')
+    date = date.replace('تاريخ النشر: ', '')
+    date = date.replace('Date de création: ', '')
+
+    date = re.sub(r"\s+", "", date, flags=re.UNICODE)
+    date = date.lower()
+    date = date.strip()
+    # remove day names
+    date = date.replace('dimanche', '')
+    date = date.replace('lundi', '')
+    date = date.replace('mardi', '')
+    date = date.replace('mercredi', '')
+    date = date.replace('jeudi', '')
+    date = date.replace('vendredi', '')
+    date = date.replace('samedi', '')
+    date = date.replace('الأحد', '')
+    date = date.replace('الإثنين', '')
+    date = date.replace('الاثنين', '')
+    date = date.replace('الثلاثاء', '')
+    date = date.replace('الأربعاء', '')
+    date = date.replace('الخميس', '')
+    date = date.replace('الجمعة', '')
+    date = date.replace('السبت', '')
+
+    date = date.replace('janvier', '01')
+    date = date.replace('january', '01')
+    date = date.replace('jan', '01')
+    date = date.replace('février', '02')
+    date = date.replace('fevrier', '02')
+    date = date.replace('fév', '02')
+    date = date.replace('fev', '02')
+    date = date.replace('february', '02')
+    date = date.replace('feb', '02')
+    date = date.replace('mars', '03')
+    date = date.replace('march', '03')
+    date = date.replace('mar', '03')
+    date = date.replace('avril', '04')
+    date = date.replace('april', '04')
+    date = date.replace('avr', '04')
+    date = date.replace('apr', '04')
+    date = date.replace('mai', '05')
+    date = date.replace('may', '05')
+    date = date.replace('juin', '06')
+    date = date.replace('june', '06')
+    date = date.replace('jun', '06')
+    date = date.replace('juillet', '07')
+    date = date.replace('juil', '07')
+    date = date.replace('july', '07')
+    date = date.replace('jul', '07')
+    date = date.replace('august', '08')
+    date = date.replace('août', '08')
+    date = date.replace('aout', '08')
+    date = date.replace('aoû', '08')
+    date = date.replace('aou', '08')
+    date = date.replace('aug', '08')
+    date = date.replace('septembre', '09')
+    date = date.replace('september', '09')
+    date = date.replace('sept', '09')
+    date = date.replace('sep', '09')
+    date = date.replace('octobre', '10')
+    date = date.replace('october', '10')
+    date = date.replace('oct', '10')
+    date = date.replace('novembre', '11')
+    date = date.replace('november', '11')
+    date = date.replace('nov', '11')
+    date = date.replace('décembre', '12')
+    date = date.replace('decembre', '12')
+    date = date.replace('december', '12')
+    date = date.replace('décember', '12')
+    date = date.replace('déc', '12')
+    date = date.replace('dec', '12')
+
+
+    date = date.replace('جانفي', '01')
+    date = date.replace('فيفري', '02')
+    date = date.replace('مارس', '03')
+    date = date.replace('أفريل', '04')
+    date = date.replace('أبريل', '04')
+    date = date.replace('مايو', '05')
+    date = date.replace('مايو', '05')
+    date = date.replace('ماي', '05')
+    date = date.replace('جوان', '06')
+    date = date.replace('جويلية', '07')
+    date = date.replace('أوت', '08')
+    date = date.replace('اوت', '08')
+    date = date.replace('سبتمبر', '09')
+    date = date.replace('أكتوير', '10')
+    date = date.replace('أكتوبر', '10')
+    date = date.replace('نوفمبر', '11')
+    date = date.replace('ديسمبر', '12')
+    date = date.replace('يناير', '01')
+    date = date.replace('فبراير', '02')
+    date = date.replace('مارس', '03')
+    date = date.replace('ابريل', '04')
+    date = date.replace('يونيو', '06')
+    date = date.replace('يوليوز', '07')
+    date = date.replace('يوليو', '07')
+    date = date.replace('اغسطس', '08')
+    date = date.replace('أغسطس', '08')
+    date = date.replace('شتنبر', '09')
+    date = date.replace('أكتوبر', '10')
+    date = date.replace('نونبر', '11')
+    date = date.replace('دجنبر', '12')
+
+    # Il y a (jamaity) - deadline
+    if 'ilya' in date:
+        date = date.split('ilya')[0]
+
+    # Min culture exception
+    cultureBatches = [
+        'minis-culture',
+        'minis-culture-news-ar',
+        'minis-culture-actions-ar',
+        'minis-culture-activites-fr'
+    ]
+    # print('date')
+    # print(current_batch)
+    # print(date)
+    if current_batch in cultureBatches and len(date) == 7:
+        # print('changed')
+        date = date[:2] + '0' + date[2:]
+    # print(date)
+    # print('------')
+
+    if len(date) == 7:
+        date = '0' + str(date)
+
+
+    # Min affaires Sociale exception
+    if date.endswith('-12:00'):
+        date = date.replace('-12:00', '')
+        date = date.strip()
+        # adjust issue with Min affaires Sociale
+        if len(date) == 7:
+            # insert zero after month value
+            date = date[:2] + '0' + date[2:]
+
+    # Tunisiair exception
+    if date.endswith(':'):
+        date = date[:len(date)-1]
+
+    if current_batch == 'contemporaryand' and '-' in date:
+        date = date[len(date)-1]
+
+    date = date.strip()
+    date = date.strip('-')
+    date = date.replace('misàjourle', '')
+
+    return date
+
+def get_raw_dates():
+    """
+    Dates found in outputs/posts/*.csv (published_at / deadline), plus day / month names in every supported form
+    """
+    dates = set()
+    for csv_file in glob.glob(os.path.join(current_script_path, 'outputs', 'posts', '*.csv')):
+        try:
+            posts = pd.read_csv(csv_file, dtype=str)
+        except Exception:
+            continue
+        for column in ['published_at', 'deadline']:
+            if column in posts:
+                dates.update(posts[column].dropna().tolist())
+    from date_utils import DATE_REPLACEMENTS
+    for name, number in DATE_REPLACEMENTS:
+        for template in ['{} 12, 2024', '12 {} 2024', 'Lundi 5 {} 2023', '<span>Date de création: </span>3 {} 2022', '1 {} 2021 -12:00', '{} 7 2020:', 'il y a 2 jours {}']:
+            dates.add(template.format(name))
+            dates.add(template.format(name.capitalize()))
+    return sorted(dates)
+
+def bench_dates(repeat):
+    """
+    DateNormalizerClass vs the former cleanDate: byte-identical outputs and CPU time
+    """
+    dates = get_raw_dates()
+    batches = [False, 'minis-culture', 'contemporaryand']
+    mismatches = 0
+    normalizer = DateNormalizerClass()
+    for batch in batches:
+        for date in dates:
+            if legacy_clean_date(date, batch) != normalizer.normalize_date(date, batch):
+                mismatches += 1
+                print('MISMATCH: ' + str(batch) + ' ' + repr(date) + ' ' + repr(legacy_clean_date(date, batch)) + ' != ' + repr(normalizer.normalize_date(date, batch)))
+
+    timings = {}
+    memoized = DateNormalizerClass()
+    for label, clean in [('legacy', legacy_clean_date), ('compiled', normalizer.normalize_date), ('compiled + memo', memoized.normalize)]:
+        start = time.process_time()
+        for i in range(repeat):
+            for batch in batches:
+                for date in dates:
+                    clean(date, batch)
+        timings[label] = (time.process_time() - start) / (repeat * len(batches) * len(dates))
+    print('#######################################')
+    print(str(len(dates) * len(batches)) + ' dates: ' + ('byte-identical' if not mismatches else str(mismatches) + ' mismatches'))
+    for label, timing in timings.items():
+        print('# ' + label + ': ' + str(round(timing * 1000000, 2)) + ' us / date')
+    return mismatches == 0
+
+# get_actu_from_link date parsing before the bulk stage (one post at a time)
+def legacy_parse_date(date, date_format, output_format, current_batch=False):
+    try:
+        dtmp = datetime.datetime.strptime(date, date_format)
+    except:
+        try:
+            dtmp = legacy_clean_date(date, current_batch)
+            dtmp = datetime.datetime.strptime(dtmp, date_format)
+        except:
+            dtmp = False
+    return dtmp.strftime(output_format) if dtmp else date
+
+def get_date_formats():
+    formats = set()
+    for csv_file in glob.glob(os.path.join(current_script_path, 'cfw-configs', '*.csv')):
+        try:
+            models = pd.read_csv(csv_file, dtype=str)
+        except Exception:
+            continue
+        for column in ['single_date_format', 'deadline_format']:
+            if column in models:
+                formats.update(models[column].dropna().tolist())
+    return sorted(formats | {'%d%m%Y', '%Y%m%d', '%d/%m/%Y', '%B %d, %Y', '%d %B %Y'})
+
+def bench_bulk_dates(repeat):
+    """
+    Bulk parsing stage vs the former per post strptime / cleanDate / strptime: same strings and CPU time
+    """
+    raw_dates = [date.rjust(8, '0') for date in get_raw_dates()]
+    days = [datetime.datetime(2019, 1, 1) + datetime.timedelta(days=17 * i) for i in range(150)]
+    normalizer = DateNormalizerClass()
+    mismatches = 0
+    total = 0
+    # dates written in the model format (usual case) / anything else (fallback path)
+    timings = {(kind, label): 0 for kind in ['in format', 'other'] for label in ['legacy', 'bulk']}
+    counts = {'in format': 0, 'other': 0}
+    for date_format in get_date_formats():
+        in_format = [day.strftime(date_format).rjust(8, '0') for day in days] if '%' in date_format else []
+        for batch in [False, 'minis-culture']:
+            for kind, dates in [('in format', in_format), ('other', raw_dates)]:
+                if not dates:
+                    continue
+                expected = [legacy_parse_date(date, date_format, '%Y-%m-%d 08:00:00', batch) for date in dates]
+                got = normalizer.parse_many(dates, date_format, '%Y-%m-%d 08:00:00', batch)
+                total += len(dates)
+                counts[kind] += len(dates)
+                for date, a, b in zip(dates, expected, got):
+                    if a != b:
+                        mismatches += 1
+                        print('MISMATCH: ' + date_format + ' ' + repr(date) + ' ' + repr(a) + ' != ' + repr(b))
+                for label, parse in [('legacy', lambda: [legacy_parse_date(date, date_format, '%Y-%m-%d 08:00:00', batch) for date in dates]), ('bulk', lambda: DateNormalizerClass().parse_many(dates, date_format, '%Y-%m-%d 08:00:00', batch))]:
+                    start = time.process_time()
+                    for i in range(repeat):
+                        parse()
+                    timings[(kind, label)] += time.process_time() - start
+    print('#######################################')
+    print(str(total) + ' dates parsed: ' + ('identical' if not mismatches else str(mismatches) + ' mismatches'))
+    for (kind, label), timing in timings.items():
+        print('# ' + kind + ' - ' + label + ': ' + str(round(timing / (repeat * counts[kind]) * 1000000, 2)) + ' us / date')
+    return mismatches == 0
+
+def bench_parse(actu, repeat):
+    """
+    CPU time per detail page (sample single pages): parsed once vs the former re-parsing
+    """
+    for site, conf in SITES.items():
+        with open(os.path.join(samples_dir, conf['single']), encoding='utf-8') as f:
+            html = f.read()
+        model = conf['model']
+        same = legacy_parse_detail(html, model) == parse_detail(actu, html, model)
+        timings = {}
+        for label, parse in [('legacy', lambda: legacy_parse_detail(html, model)), ('parsed once', lambda: parse_detail(actu, html, model))]:
+            start = time.process_time()
+            for i in range(repeat):
+                parse()
+            timings[label] = (time.process_time() - start) / repeat
+        print('#######################################')
+        print(conf['single'] + ' (' + str(round(len(html) / 1024)) + ' KB)' + ('' if same else ' - OUTPUT MISMATCH'))
+        for label, timing in timings.items():
+            print('# ' + label + ': ' + str(round(timing * 1000, 1)) + ' ms CPU / post')
+        print('# Saved: ' + str(round((timings['legacy'] - timings['parsed once']) * 1000, 1)) + ' ms CPU / post')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark ActuClass against local mock sites (no network)')
+    parser.add_argument('--mode', default='pipeline', choices=['pipeline', 'parse', 'boilerplate', 'dates', 'listing', 'decode', 'history', 'compaction', 'exports'], help='Full pipeline against the mock sites, detail page parsing only, boilerplate removal, date normaliser, region listing parsing, bytes decoding equivalence, processed urls history startup / lookups, history growth over runs (--repeat runs) or csv / parquet exports of the extracted posts')
+    parser.add_argument('--pages', type=int, default=3, help='Listing pages per site')
+    parser.add_argument('--listing-parse-mode', default='', choices=['', 'region'], help='listing_parse_mode of the mock site models')
+    parser.add_argument('--latency', type=float, default=0.02, help='Server latency per request (seconds)')
+    parser.add_argument('--jitter', type=float, default=0.0, help='Random +/- latency (seconds)')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Share of requests answered with a 503')
+    parser.add_argument('--seed', type=int, default=0, help='Seed of latency jitter / errors')
+    parser.add_argument('--repeat', type=int, default=1, help='Runs against the same config dir (warm http cache) / iterations per sample')
+    parser.add_argument('--async-engine', action='store_true')
+    parser.add_argument('--max-concurrency', type=int, default=8)
+    parser.add_argument('--max-concurrency-per-host', type=int, default=2)
+    parser.add_argument('--prefetch-pages', type=int, default=0)
+    parser.add_argument('--early-stop-pages', type=int, default=0)
+    parser.add_argument('--http-cache', action='store_true')
+    parser.add_argument('--http-retries', type=int, default=3)
+    parser.add_argument('--state-db', action='store_true', help='Processed urls in a SQLite state store instead of the csv files')
+    parser.add_argument('--url-index', action='store_true', help='Processed urls looked up in the memory-mapped fingerprint index')
+    parser.add_argument('--export-size', type=int, default=20000, help='Posts of the exports benchmark (extracted posts repeated)')
+    parser.add_argument('--history-size', type=int, default=200000, help='Processed urls of the history benchmark')
+    parser.add_argument('--keep-history', action='store_true', help='Repeated runs skip the posts processed by the previous ones (monitoring mode)')
+    parser.add_argument('--verbose', action='store_true', help='Show the pipeline output')
+    args = parser.parse_args()
+
+    actu_params = dict(
+        use_async_engine = args.async_engine,
+        max_concurrency = args.max_concurrency,
+        max_concurrency_per_host = args.max_concurrency_per_host,
+        prefetch_pages = args.prefetch_pages,
+        early_stop_pages = args.early_stop_pages,
+        enable_http_cache = args.http_cache,
+        http_retries = args.http_retries,
+        use_state_db = args.state_db,
+        use_url_index = args.url_index,
+    )
+
+    if args.mode == 'parse':
+        config_dir = tempfile.mkdtemp(prefix='bench_ultscan_')
+        try:
+            prepare_config_dir(config_dir, get_post_models('http://127.0.0.1/', args.pages))
+            bench_parse(get_actu(config_dir, actu_params, args.verbose), args.repeat)
+        finally:
+            shutil.rmtree(config_dir, ignore_errors=True)
+        return
+
+    if args.mode in ['history', 'compaction']:
+        config_dir = tempfile.mkdtemp(prefix='bench_ultscan_')
+        try:
+            bench = bench_history if args.mode == 'history' else bench_compaction
+            if not bench(config_dir, args.history_size, args.repeat):
+                exit(1)
+        finally:
+            shutil.rmtree(config_dir, ignore_errors=True)
+        return
+
+    if args.mode == 'dates':
+        if not bench_dates(args.repeat) or not bench_bulk_dates(args.repeat):
+            exit(1)
+        return
+
+    if args.mode in ('listing', 'decode'):
+        config_dir = tempfile.mkdtemp(prefix='bench_ultscan_')
+        try:
+            prepare_config_dir(config_dir, get_post_models('http://127.0.0.1/', args.pages))
+            bench = bench_listing if args.mode == 'listing' else bench_decode
+            if not bench(get_actu(config_dir, actu_params, args.verbose), args.repeat):
+                exit(1)
+        finally:
+            shutil.rmtree(config_dir, ignore_errors=True)
+        return
+
+    if args.mode == 'boilerplate':
+        config_dir = tempfile.mkdtemp(prefix='bench_ultscan_')
+        try:
+            prepare_config_dir(config_dir, get_post_models('http://127.0.0.1/', args.pages))
+            if not bench_boilerplate(get_actu(config_dir, actu_params, args.verbose), args.repeat):
+                exit(1)
+        finally:
+            shutil.rmtree(config_dir, ignore_errors=True)
+        return
+
+    server = MockSiteServer(pages=args.pages, latency=args.latency, jitter=args.jitter, error_rate=args.error_rate, seed=args.seed).start()
+    config_dir = tempfile.mkdtemp(prefix='bench_ultscan_')
+    try:
+        models = get_post_models(server.get_url(), args.pages)
+        for model in models:
+            model['listing_parse_mode'] = args.listing_parse_mode
+        if args.mode == 'exports':
+            prepare_config_dir(config_dir, models)
+            posts, elapsed, latencies = run_pipeline(config_dir, actu_params, args.verbose)
+            if not bench_exports(get_actu(config_dir, dict(actu_params, should_save_parquet=True), args.verbose), posts, args.export_size, args.repeat):
+                exit(1)
+            return
+        for i in range(args.repeat):
+            if i == 0 or not args.keep_history:
+                prepare_config_dir(config_dir, models)
+            requests_before = server.requests
+            posts, elapsed, latencies = run_pipeline(config_dir, actu_params, args.verbose, args.keep_history)
+            print_report('Run ' + str(i + 1) + ' / ' + str(args.repeat), server.requests - requests_before, posts, elapsed, latencies)
+        print('# Server errors (503): ' + str(server.errors))
+    finally:
+        server.stop()
+        shutil.rmtree(config_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+'''
+# Boilerplate removal (share bars, breadcrumbs, metas...) in a single walk of the content tree
+'''
+import csv
+import os
+import re
+
+
+__all__ = ("BoilerplateClass",)
+
+# (domain, tag, class) - '' domain: every site, '' class: every element of the tag
+DEFAULT_RULES = [
+    ('', 'script', ''),
+    ('', 'style', ''),
+    ('', 'ul', 'breadcrumb'),
+    ('', 'div', 'post-meta'),
+    ('', 'div', 'addtoany_share_save_container addtoany_content addtoany_content_top'),
+    ('', 'div', 'news-single-backlink'),
+    ('', 'div', 'post-footer'),
+    ('', 'ul', 'metas'),
+    ('', 'div', 'shareBar'),
+    ('', 'div', 'article-comments'),
+    ('', 'div', 'news__image col-sm-6'),
+    ('', 'span', 'reforme_date'),
+    ('', 'ul', 'joomla_add_this'),
+    ('', 'div', 'addthis_inline_share_toolbox'),
+    ('', 'div', 'ssba ssba-wrap'),
+    ('', 'div', 'btn-flip-container'),
+    ('', 'div', 'cmsImg'),
+    ('', 'div', 'cmsDate'),
+    ('', 'div', 'outils1'),
+]
+
+# markup left in the text (escaped html of the page), applied in this order
+TEXT_PATTERNS = [re.compile(pattern) for pattern in [
+    '<div class="addthis_inline_share_toolbox".*?</ul>',
+    '<div class="mainFig">.*?</div>',
+    '<div class="share-links">.*?</div>',
+    '<div class="atclear">.*?</div>',
+    '<div class="addthis_toolbox">.*?</div>',
+    '<figure class="wp-block-image size-large">.*?</figure>',
+    '<.*?>',
+]]
+SHARE_TEXT = 'Facebook Twitter LinkedIn Whatsapp Share via Email Print'
+
+class BoilerplateClass:
+    def __init__(self,
+            *,
+            rules_csv: str = '', # extra rules (domain,tag,class columns), added to DEFAULT_RULES
+        ):
+        self._rules = list(DEFAULT_RULES)
+        if rules_csv and os.path.isfile(rules_csv):
+            with open(rules_csv, encoding='utf-8') as f:
+                for row in csv.DictReader(f):
+                    if row.get('tag'):
+                        self._rules.append(((row.get('domain') or '').strip().lower(), row['tag'].strip().lower(), (row.get('class') or '').strip()))
+        self._compiled = {}
+
+    def get_rules(self, domain=''):
+        """
+        Returns {tag: set of classes ('' = any element)} of the rules matching domain (cached)
+        """
+        domain = (domain or '').lower()
+        if not domain in self._compiled:
+            rules = {}
+            for rule_domain, tag, class_name in self._rules:
+                if rule_domain == '' or domain == rule_domain or domain.endswith('.' + rule_domain):
+                    rules.setdefault(tag, set()).add(class_name)
+            self._compiled[domain] = rules
+        return self._compiled[domain]
+
+    def is_boilerplate(self, element, rules):
+        classes_rules = rules.get(element.tag)
+        if not classes_rules:
+            return False
+        if '' in classes_rules:
+            return True
+        # same as BeautifulSoup class matching: one of the classes or the whole class attribute
+        classes = element.get('class', '').split()
+        return any(class_name in classes_rules for class_name in classes) or ' '.join(classes) in classes_rules
+
+    def remove(self, tree, domain=''):
+        """
+        Remove boilerplate elements from tree (lxml element) - returns False if tree itself is boilerplate
+        """
+        rules = self.get_rules(domain)
+        removals = [element for element in tree.iter() if isinstance(element.tag, str) and self.is_boilerplate(element, rules)]
+        for element in removals:
+            if element is tree:
+                return False
+            # keeps the text following the element
+            element.drop_tree()
+        return True
+
+    def clean_text(self, text):
+        """
+        Remove markup and share bars left in the extracted text
+        """
+        if '<' in text:
+            for pattern in TEXT_PATTERNS:
+                text = pattern.sub('', text)
+        return text.replace(SHARE_TEXT, '')
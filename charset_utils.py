@@ -0,0 +1,83 @@
+'''
+# Charset of fetched pages, detected once per host
+'''
+import codecs
+import re
+import threading
+from urllib.parse import urlparse
+
+from requests.compat import chardet
+
+
+__all__ = ("CharsetCacheClass",)
+
+HEADER_CHARSET_PATTERN = re.compile(r'charset\s*=\s*["\']?([\w.:\-]+)', flags=re.I)
+META_CHARSET_PATTERN = re.compile(rb'<meta[^>]+charset\s*=\s*["\']?\s*([\w.:\-]+)', flags=re.I)
+
+class CharsetCacheClass:
+    def __init__(self,
+            *,
+            default: str = 'utf-8', # pages without any hint (ascii only) / undetected
+            sniff_bytes: int = 4096, # start of the page searched for a <meta charset>
+        ):
+        self._default = default
+        self._sniff_bytes = sniff_bytes
+        self._hosts = {}
+        self._lock = threading.Lock()
+
+    def get_encoding(self, url, response):
+        """
+        Returns the charset of response, detected on the first conclusive page of url's host then cached
+        """
+        host = urlparse(url).netloc
+        encoding = self._hosts.get(host)
+        if encoding:
+            return encoding
+        encoding, conclusive = self.detect(response.content, response.headers.get('content-type', ''))
+        if conclusive:
+            with self._lock:
+                self._hosts[host] = encoding
+        return encoding
+
+    def detect(self, content, content_type=''):
+        """
+        Returns (encoding, conclusive): valid utf-8 first, then the declared charset (header / meta), then a guess
+        Ascii only pages are read as the default charset but say nothing about the next pages of the host
+        """
+        if content.isascii():
+            return self._default, False
+        try:
+            content.decode('utf-8')
+            return 'utf-8', True
+        except UnicodeDecodeError:
+            pass
+        declared = self.get_declared_charset(content, content_type)
+        if declared:
+            return declared, True
+        guess = chardet.detect(content)['encoding'] if chardet else None
+        return self.get_codec_name(guess) or self._default, True
+
+    def get_declared_charset(self, content, content_type=''):
+        match = HEADER_CHARSET_PATTERN.search(content_type or '')
+        if match and self.get_codec_name(match.group(1)):
+            return self.get_codec_name(match.group(1))
+        match = META_CHARSET_PATTERN.search(content[:self._sniff_bytes])
+        if match:
+            return self.get_codec_name(match.group(1).decode('ascii', 'ignore'))
+        return None
+
+    def get_codec_name(self, name):
+        # None for unknown charsets
+        try:
+            return codecs.lookup(name).name if name else None
+        except LookupError:
+            return None
+
+    def get_stats(self):
+        """
+        Returns {charset: number of hosts}
+        """
+        stats = {}
+        for encoding in list(self._hosts.values()):
+            stats[encoding] = stats.get(encoding, 0) + 1
+        return stats
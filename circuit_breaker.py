@@ -0,0 +1,92 @@
+'''
+# Per host circuit breaker (fail fast on hosts that keep failing)
+'''
+import threading
+import time
+
+import requests
+from termcolor import colored
+
+
+__all__ = ("CircuitBreakerClass", "CircuitOpenError")
+
+class CircuitOpenError(requests.exceptions.ConnectionError):
+    """
+    Raised instead of sending a request to a host whose circuit is open
+    """
+
+
+class CircuitBreakerClass:
+    def __init__(self,
+            *,
+            failure_threshold: int = 5, # consecutive request errors (timeouts, connection errors...) before opening
+            reset_timeout: float = 120, # seconds before a half-open probe is allowed
+        ):
+        self._failure_threshold = failure_threshold
+        self._reset_timeout = reset_timeout
+        self._hosts = {}
+        self._lock = threading.Lock()
+
+    def get_host_state(self, host):
+        if not host in self._hosts:
+            self._hosts[host] = {
+                'state': 'closed', # closed / open / half_open
+                'failures': 0,
+                'opened_at': 0,
+                'probing': False,
+                'trips': 0,
+                'rejected': 0,
+            }
+        return self._hosts[host]
+
+    def before_request(self, host):
+        """
+        Raise CircuitOpenError if host must fail fast
+        While half-open, a single probe request goes through
+        """
+        with self._lock:
+            h = self.get_host_state(host)
+            if h['state'] == 'open' and time.time() - h['opened_at'] >= self._reset_timeout:
+                h['state'] = 'half_open'
+                h['probing'] = False
+            if h['state'] == 'closed':
+                return
+            if h['state'] == 'half_open' and not h['probing']:
+                h['probing'] = True
+                return
+            h['rejected'] += 1
+        raise CircuitOpenError('Circuit open for ' + str(host) + ' (failing fast)')
+
+    def record_success(self, host):
+        with self._lock:
+            h = self.get_host_state(host)
+            if h['state'] != 'closed':
+                print(colored('Circuit closed for ' + str(host), 'green'))
+            h['state'] = 'closed'
+            h['failures'] = 0
+            h['probing'] = False
+
+    def record_failure(self, host):
+        with self._lock:
+            h = self.get_host_state(host)
+            h['failures'] += 1
+            h['probing'] = False
+            if h['state'] == 'half_open' or (h['state'] == 'closed' and h['failures'] >= self._failure_threshold):
+                h['state'] = 'open'
+                h['opened_at'] = time.time()
+                h['trips'] += 1
+                print(colored('Circuit opened for ' + str(host) + ' (' + str(h['failures']) + ' consecutive failures)', 'red'))
+
+    def release_probe(self, host):
+        """
+        Let another half-open probe through (the probe request ended without a response nor a request error)
+        """
+        with self._lock:
+            self.get_host_state(host)['probing'] = False
+
+    def get_stats(self):
+        """
+        Returns {host: {'trips': n, 'rejected': n}} for hosts that tripped
+        """
+        with self._lock:
+            return {host: {'trips': h['trips'], 'rejected': h['rejected']} for host, h in self._hosts.items() if h['trips']}
@@ -0,0 +1,79 @@
+'''
+# Append-only crawl journal (one JSON lines file per batch) used to resume a crashed run
+'''
+import glob
+import json
+import os
+import threading
+
+
+__all__ = ("CrawlJournalClass",)
+
+class CrawlJournalClass:
+    def __init__(self,
+            *,
+            journal_dir: str,
+        ):
+        self._journal_dir = journal_dir
+        self._files = {}
+        self._lock = threading.Lock()
+        os.makedirs(journal_dir, exist_ok=True)
+
+    def get_path(self, key):
+        return os.path.join(self._journal_dir, key + '.jsonl')
+
+    def to_json(self, value):
+        # numpy scalars (pandas rows)
+        if hasattr(value, 'item'):
+            return value.item()
+        return str(value)
+
+    def append(self, key, record):
+        """
+        Write record to the journal of key, flushed to disk before returning
+        """
+        line = json.dumps(record, default=self.to_json) + '\n'
+        with self._lock:
+            if not key in self._files:
+                self._files[key] = open(self.get_path(key), 'a', encoding='utf-8')
+            f = self._files[key]
+            f.write(line)
+            f.flush()
+            os.fsync(f.fileno())
+
+    def load(self, key):
+        """
+        Returns {'pages': {counter: articles}, 'posts': [{'link', 'post'}], 'done': bool} of key
+        """
+        state = {'pages': {}, 'posts': [], 'done': False}
+        path = self.get_path(key)
+        if not os.path.isfile(path):
+            return state
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # last line of a crashed run
+                    continue
+                if record['type'] == 'page':
+                    state['pages'][record['counter']] = record['articles']
+                if record['type'] == 'post':
+                    state['posts'].append(record)
+                if record['type'] == 'done':
+                    state['done'] = True
+        return state
+
+    def close(self):
+        with self._lock:
+            for f in self._files.values():
+                f.close()
+            self._files = {}
+
+    def clear(self):
+        """
+        Remove every batch journal (after the run was saved)
+        """
+        self.close()
+        for path in glob.glob(os.path.join(self._journal_dir, '*.jsonl')):
+            os.remove(path)
@@ -0,0 +1,236 @@
+'''
+# Date normaliser (day / month names -> numbers) with one compiled pass and a memo per (batch, raw date)
+# and bulk date parsing (one vectorized pandas call per format)
+'''
+import datetime
+import re
+import threading
+
+import pandas as pd
+
+
+__all__ = ("DateNormalizerClass",)
+
+# applied in this order (first listed wins when several names match at the same position)
+DATE_REPLACEMENTS = [
+    # remove day names
+    ('dimanche', ''),
+    ('lundi', ''),
+    ('mardi', ''),
+    ('mercredi', ''),
+    ('jeudi', ''),
+    ('vendredi', ''),
+    ('samedi', ''),
+    ('الأحد', ''),
+    ('الإثنين', ''),
+    ('الاثنين', ''),
+    ('الثلاثاء', ''),
+    ('الأربعاء', ''),
+    ('الخميس', ''),
+    ('الجمعة', ''),
+    ('السبت', ''),
+
+    ('janvier', '01'),
+    ('january', '01'),
+    ('jan', '01'),
+    ('février', '02'),
+    ('fevrier', '02'),
+    ('fév', '02'),
+    ('fev', '02'),
+    ('february', '02'),
+    ('feb', '02'),
+    ('mars', '03'),
+    ('march', '03'),
+    ('mar', '03'),
+    ('avril', '04'),
+    ('april', '04'),
+    ('avr', '04'),
+    ('apr', '04'),
+    ('mai', '05'),
+    ('may', '05'),
+    ('juin', '06'),
+    ('june', '06'),
+    ('jun', '06'),
+    ('juillet', '07'),
+    ('juil', '07'),
+    ('july', '07'),
+    ('jul', '07'),
+    ('august', '08'),
+    ('août', '08'),
+    ('aout', '08'),
+    ('aoû', '08'),
+    ('aou', '08'),
+    ('aug', '08'),
+    ('septembre', '09'),
+    ('september', '09'),
+    ('sept', '09'),
+    ('sep', '09'),
+    ('octobre', '10'),
+    ('october', '10'),
+    ('oct', '10'),
+    ('novembre', '11'),
+    ('november', '11'),
+    ('nov', '11'),
+    ('décembre', '12'),
+    ('decembre', '12'),
+    ('december', '12'),
+    ('décember', '12'),
+    ('déc', '12'),
+    ('dec', '12'),
+
+    ('جانفي', '01'),
+    ('فيفري', '02'),
+    ('مارس', '03'),
+    ('أفريل', '04'),
+    ('أبريل', '04'),
+    ('مايو', '05'),
+    ('ماي', '05'),
+    ('جوان', '06'),
+    ('جويلية', '07'),
+    ('أوت', '08'),
+    ('اوت', '08'),
+    ('سبتمبر', '09'),
+    ('أكتوير', '10'),
+    ('أكتوبر', '10'),
+    ('نوفمبر', '11'),
+    ('ديسمبر', '12'),
+    ('يناير', '01'),
+    ('فبراير', '02'),
+    ('ابريل', '04'),
+    ('يونيو', '06'),
+    ('يوليوز', '07'),
+    ('يوليو', '07'),
+    ('اغسطس', '08'),
+    ('أغسطس', '08'),
+    ('شتنبر', '09'),
+    ('نونبر', '11'),
+    ('دجنبر', '12'),
+]
+DATE_NAMES = dict(DATE_REPLACEMENTS)
+DATE_NAMES_PATTERN = re.compile('|'.join(re.escape(name) for name, number in DATE_REPLACEMENTS))
+
+TAGS_PATTERN = re.compile('<.*?>')
+PREFIXES_PATTERN = re.compile('|'.join(re.escape(prefix) for prefix in [',', '،', '◔', 'تاريخ النشر: ', 'Date de création: ']))
+SPACES_PATTERN = re.compile(r"\s+", flags=re.UNICODE)
+
+# Min culture exception
+CULTURE_BATCHES = [
+    'minis-culture',
+    'minis-culture-news-ar',
+    'minis-culture-actions-ar',
+    'minis-culture-activites-fr'
+]
+
+class DateNormalizerClass:
+    def __init__(self,
+            *,
+            max_cache: int = 100000, # memoized raw dates (the memo is emptied above)
+        ):
+        self._max_cache = max_cache
+        self._cache = {}
+        self._lock = threading.Lock()
+
+    def normalize(self, date, current_batch=False):
+        """
+        Returns date without html / day names, month names replaced by their number (memoized)
+        """
+        key = (current_batch, date)
+        result = self._cache.get(key)
+        if result is None:
+            result = self.normalize_date(date, current_batch)
+            with self._lock:
+                if len(self._cache) >= self._max_cache:
+                    self._cache.clear()
+                self._cache[key] = result
+        return result
+
+    def normalize_date(self, date, current_batch=False):
+        date = TAGS_PATTERN.sub('', date)
+        date = PREFIXES_PATTERN.sub('', date)
+
+        date = SPACES_PATTERN.sub('', date)
+        date = date.lower()
+        date = date.strip()
+        date = DATE_NAMES_PATTERN.sub(lambda m: DATE_NAMES[m.group(0)], date)
+
+        # Il y a (jamaity) - deadline
+        if 'ilya' in date:
+            date = date.split('ilya')[0]
+
+        if current_batch in CULTURE_BATCHES and len(date) == 7:
+            date = date[:2] + '0' + date[2:]
+
+        if len(date) == 7:
+            date = '0' + str(date)
+
+        # Min affaires Sociale exception
+        if date.endswith('-12:00'):
+            date = date.replace('-12:00', '')
+            date = date.strip()
+            # adjust issue with Min affaires Sociale
+            if len(date) == 7:
+                # insert zero after month value
+                date = date[:2] + '0' + date[2:]
+
+        # Tunisiair exception
+        if date.endswith(':'):
+            date = date[:len(date)-1]
+
+        if current_batch == 'contemporaryand' and '-' in date:
+            date = date[len(date)-1]
+
+        date = date.strip()
+        date = date.strip('-')
+        date = date.replace('misàjourle', '')
+
+        return date
+
+    def parse_many(self, dates, date_format, output_format, current_batch=False):
+        """
+        Returns dates parsed with date_format and written with output_format, unparsed dates kept as is
+        Same result as strptime(date), else strptime(normalised date) on each date: every pass is a single
+        pandas call, only its failures (out of pandas range, unusual formats...) go through strptime
+        """
+        result = list(dates)
+        if not result or not isinstance(date_format, str):
+            return result
+        pending = list(range(len(result)))
+        for normalised in (False, True):
+            values = [self.normalize(result[i], current_batch) if normalised else result[i] for i in pending]
+            parsed = self.to_datetime_str(values, date_format, output_format)
+            failed = []
+            for i, value in zip(pending, parsed):
+                if value is None:
+                    failed.append(i)
+                else:
+                    result[i] = value
+            pending = failed
+            if not pending:
+                return result
+        for i in pending:
+            result[i] = self.strptime_str(result[i], date_format, output_format, current_batch)
+        return result
+
+    def to_datetime_str(self, values, date_format, output_format):
+        # None where pandas could not parse
+        try:
+            parsed = pd.to_datetime(pd.Series(values, dtype=object), format=date_format, errors='coerce')
+            time_format = output_format[len('%Y-%m-%d'):]
+            if output_format.startswith('%Y-%m-%d') and not '%' in time_format and not isinstance(parsed.dtype, pd.DatetimeTZDtype):
+                # Series.dt.strftime formats each date in python: build the day strings with numpy instead
+                formatted = parsed.to_numpy().astype('datetime64[D]').astype(str)
+                return [None if day == 'NaT' else day + time_format for day in formatted]
+            formatted = parsed.dt.strftime(output_format)
+        except Exception:
+            return [None] * len(values)
+        return [None if pd.isna(value) else value for value in formatted]
+
+    def strptime_str(self, date, date_format, output_format, current_batch=False):
+        try:
+            dtmp = datetime.datetime.strptime(date, date_format)
+        except Exception:
+            try:
+                dtmp = datetime.datetime.strptime(self.normalize(date, current_batch), date_format)
+            except Exception:
+                return date
+        return dtmp.strftime(output_format)
@@ -9,7 +9,28 @@ openpyn au -a paris
 '''
 
 import argparse
+from concurrent.futures import ProcessPoolExecutor
 from actu_class import ActuClass
+from fingerprint_index import FingerprintIndexClass
+from url_index import ProcessedUrlIndexClass
+
+
+# ActuClass of the current worker process (--workers)
+worker_actu = None
+
+def init_worker(actu_params):
+    global worker_actu
+    worker_actu = ActuClass(**actu_params)
+
+def extract_batch_worker(model_index):
+    """
+    Extract one batch (post_models row) in a worker process
+    Returns (new posts, run stats), merged later by the parent process (image urls are saved from the posts)
+    """
+    run_stats = worker_actu.get_run_stats()
+    newPosts = worker_actu.extract_new_posts(model_indexes=[model_index])
+    run_stats = worker_actu.sum_stats(worker_actu.get_run_stats(), run_stats, sign=-1)
+    return newPosts, run_stats
 
 
 def main():
@@ -35,6 +56,27 @@ def main():
     parser.add_argument('-dc', '--dir-config', help='Relative or absolute directory of configs')
     parser.add_argument('-dsc', '--dir-store-csv', help='Relative or absolute directory of csv storage')
     parser.add_argument('-dsi', '--dir-store-image', help='Relative or absolute directory of image storage')
+    parser.add_argument('-ae', '--async-engine', action='store_true', help='Fetch listing and detail pages concurrently')
+    parser.add_argument('-mc', '--max-concurrency', type=int, default=8, help='Max simultaneous requests (async engine)')
+    parser.add_argument('-mch', '--max-concurrency-per-host', type=int, default=2, help='Max simultaneous requests per host (async engine)')
+    parser.add_argument('-hps', '--http-pool-size', type=int, default=10, help='Kept-alive connections per host')
+    parser.add_argument('-hr', '--http-retries', type=int, default=3, help='Retries on 429 / 5xx (connection errors and timeouts are not retried)')
+    parser.add_argument('-hc', '--http-cache', action='store_true', help='Cache listing pages on disk and revalidate them (ETag / Last-Modified)')
+    parser.add_argument('-hcm', '--http-cache-max-mb', type=float, default=200, help='Max size of the http cache (MB)')
+    parser.add_argument('-es', '--early-stop-pages', type=int, default=0, help='Stop a batch after N listing pages already processed in a row (0: never)')
+    parser.add_argument('-pp', '--prefetch-pages', type=int, default=0, help='Fetch the next N listing pages concurrently')
+    parser.add_argument('-cbt', '--circuit-breaker-threshold', type=int, default=5, help='Fail fast on a host after N request errors (timeouts, connection errors...) in a row (0: never)')
+    parser.add_argument('-at', '--adaptive-timeouts', action='store_true', help='Tune timeouts per host from observed latencies (persisted in the config dir)')
+    parser.add_argument('-j', '--journal', action='store_true', help='Journal extracted pages / posts so a crashed run can be resumed')
+    parser.add_argument('-r', '--resume', action='store_true', help='Resume the journaled run (skip finished batches and pages)')
+    parser.add_argument('-ar', '--archive', default='', choices=['', 'record', 'replay'], help='Record raw listing / detail responses, or replay them to re-extract posts offline')
+    parser.add_argument('-sd', '--state-db', action='store_true', help='Keep processed urls in <dir-config>/state.db (SQLite, shared by parallel runs) instead of the processed_*.csv files')
+    parser.add_argument('-ui', '--url-index', action='store_true', help='Look processed post urls up in a memory-mapped index (<dir-config>/processed_posts_urls.fp) instead of loading the csv')
+    parser.add_argument('-rui', '--rebuild-url-index', action='store_true', help='Rebuild <dir-config>/processed_posts_urls.fp from processed_posts_urls.csv and exit')
+    parser.add_argument('-ch', '--compact-history', action='store_true', help='Dedupe, sort and rewrite the processed_*.csv files and exit')
+    parser.add_argument('-hcr', '--history-compaction-ratio', type=float, default=0.5, help='Duplicate ratio of a processed_*.csv file above which it is compacted after the run (0 = off)')
+    parser.add_argument('-pq', '--parquet', action='store_true', help='Also save new posts as posts-*.parquet (typed columns, requires pyarrow)')
+    parser.add_argument('-w', '--workers', type=int, default=1, help='Number of processes used to extract batches in parallel')
     args = parser.parse_args()
 
     ##############
@@ -1146,7 +1188,7 @@ def main():
         "document_title": False
     }
     '''
-    actuLib = ActuClass(
+    actu_params = dict(
         config_dir = config_path,
         db_post_models_csv = config_path + '/post_models.csv',
         db_already_processed_posts_csv = config_path + '/processed_posts_urls.csv',
@@ -1155,12 +1197,30 @@ def main():
         should_use_same_session = False, # Force the usage of same session
         is_deep_scan_mode = True, # should scan all pages
         default_pagination_limit = 1, # should scan all pages
+        early_stop_pages = args.early_stop_pages,
+        prefetch_pages = args.prefetch_pages,
         debug_mode = False, # should debug test_model
+        use_async_engine = args.async_engine,
+        max_concurrency = args.max_concurrency,
+        max_concurrency_per_host = args.max_concurrency_per_host,
+        http_pool_size = args.http_pool_size,
+        http_retries = args.http_retries,
+        enable_http_cache = args.http_cache,
+        http_cache_max_mb = args.http_cache_max_mb,
+        circuit_breaker_threshold = args.circuit_breaker_threshold,
+        adaptive_timeouts = args.adaptive_timeouts,
+        enable_journal = args.journal or args.resume,
+        resume = args.resume,
+        archive_mode = args.archive,
+        state_db = config_path + '/state.db' if args.state_db else '',
+        url_index_file = config_path + '/processed_posts_urls.fp' if args.url_index else '',
+        history_compaction_ratio = args.history_compaction_ratio,
         test_model = test_model,
         db_storage_csv = db_storage_csv,
 
         # handle auto images download
         should_save_image = False,
+        should_save_parquet = args.parquet,
         db_storage_image = db_storage_image,
 
         # analytics
@@ -1168,11 +1228,37 @@ def main():
         tracking_id= 'MO-XXXXX-X',
         tracking_domain= 'yourdomain.com',
     )
+    if args.rebuild_url_index:
+        url_index = FingerprintIndexClass(index_file=config_path + '/processed_posts_urls.fp')
+        total = url_index.build_from_csv(actu_params['db_already_processed_posts_csv'], ProcessedUrlIndexClass().canonical)
+        print('# Url index rebuilt: ' + str(total) + ' urls (' + config_path + '/processed_posts_urls.fp)')
+        return
+
+    actuLib = ActuClass(**actu_params)
+    if args.compact_history:
+        actuLib.compact_history(force=True)
+        return
+
+    if args.journal and not args.resume:
+        # new run: forget the journal of a previous one
+        actuLib.clear_journal()
 
-    newPosts = actuLib.extract_new_posts()
+    if args.workers > 1 and not actu_params['debug_mode']:
+        # spread batches over worker processes, then merge their results (models order)
+        model_indexes = range(len(actuLib.get_models()))
+        with ProcessPoolExecutor(max_workers=args.workers, initializer=init_worker, initargs=(actu_params,)) as executor:
+            results = list(executor.map(extract_batch_worker, model_indexes))
+        newPosts = actuLib.merge_new_posts([r[0] for r in results])
+        for r in results:
+            actuLib.merge_run_stats(r[1])
+    else:
+        newPosts = actuLib.extract_new_posts()
 
     actuLib.save_already_processed_items()
     actuLib.save_new_items()
+    actuLib.clear_journal()
+    actuLib.save_latency_histograms()
+    actuLib.print_run_summary()
     # actuLib.tag_all_posts()
 
 
@@ -0,0 +1,49 @@
+'''
+# Exclusive lock file, shared by the runs (processes) rewriting a same file
+'''
+try:
+    import fcntl
+except ImportError:
+    # windows
+    fcntl = None
+    import msvcrt
+
+
+__all__ = ("FileLockClass",)
+
+class FileLockClass:
+    def __init__(self,
+            *,
+            lock_file: str,
+        ):
+        self._lock_file = lock_file
+        self._file = None
+
+    def acquire(self):
+        """
+        Wait until no other holder has the lock
+        """
+        self._file = open(self._lock_file, 'a+')
+        if fcntl:
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_EX)
+        else:
+            self._file.seek(0)
+            msvcrt.locking(self._file.fileno(), msvcrt.LK_LOCK, 1)
+
+    def release(self):
+        if self._file is None:
+            return
+        if fcntl:
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+        else:
+            self._file.seek(0)
+            msvcrt.locking(self._file.fileno(), msvcrt.LK_UNLCK, 1)
+        self._file.close()
+        self._file = None
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *args):
+        self.release()
@@ -0,0 +1,118 @@
+'''
+# On-disk index of processed urls: sorted 64-bit fingerprints, memory-mapped and binary-searched
+'''
+import csv
+import hashlib
+import os
+from array import array
+
+import numpy as np
+
+from file_lock import FileLockClass
+
+
+__all__ = ("FingerprintIndexClass",)
+
+# file: magic (8 bytes) + size of the csv it was built from (8 bytes) + sorted little-endian uint64
+MAGIC = b'ULTFP01\x00'
+HEADER_SIZE = 16
+
+class FingerprintIndexClass:
+    def __init__(self,
+            *,
+            index_file: str,
+        ):
+        self._index_file = index_file
+        # merges / rebuilds of every run go through it
+        self._lock = FileLockClass(lock_file=index_file + '.lock')
+        self.load()
+
+    def fingerprint(self, key):
+        return int.from_bytes(hashlib.blake2b(key.encode('utf-8'), digest_size=8).digest(), 'little')
+
+    def load(self):
+        """
+        Map the index file (nothing is read until looked up)
+        """
+        self._source_size = None
+        self._fingerprints = np.empty(0, dtype='<u8')
+        if not os.path.isfile(self._index_file) or os.path.getsize(self._index_file) < HEADER_SIZE:
+            return False
+        with open(self._index_file, 'rb') as f:
+            header = f.read(HEADER_SIZE)
+        if header[:8] != MAGIC:
+            return False
+        self._source_size = int.from_bytes(header[8:], 'little')
+        count = (os.path.getsize(self._index_file) - HEADER_SIZE) // 8
+        if count:
+            self._fingerprints = np.memmap(self._index_file, dtype='<u8', mode='r', offset=HEADER_SIZE, shape=(count,))
+        else:
+            self._fingerprints = np.empty(0, dtype='<u8')
+        return True
+
+    def is_stale(self, source_csv):
+        """
+        True if source_csv changed since the index was built (or if there is no index)
+        """
+        source_size = os.path.getsize(source_csv) if os.path.isfile(source_csv) else 0
+        return self._source_size != source_size
+
+    def contains(self, key):
+        fingerprint = np.uint64(self.fingerprint(key))
+        i = int(np.searchsorted(self._fingerprints, fingerprint))
+        return i < len(self._fingerprints) and bool(self._fingerprints[i] == fingerprint)
+
+    def get_csv_fingerprints(self, source_csv, canonical=None):
+        """
+        Returns (fingerprints, size) of a processed urls csv read row by row, size taken before reading
+        """
+        source_size = os.path.getsize(source_csv) if os.path.isfile(source_csv) else 0
+        fingerprints = array('Q')
+        if os.path.isfile(source_csv):
+            with open(source_csv) as f:
+                for row in csv.reader(f, delimiter=','):
+                    for url in row:
+                        # "0": header written by the former save_csv
+                        if url and url != '0':
+                            fingerprints.append(self.fingerprint(canonical(url) if canonical else url))
+        return np.frombuffer(fingerprints, dtype=np.uint64) if fingerprints else np.empty(0, dtype='<u8'), source_size
+
+    def build_from_csv(self, source_csv, canonical=None):
+        """
+        Rebuild the index from a processed urls csv, returns the number of urls
+        """
+        with self._lock:
+            self.write(*self.get_csv_fingerprints(source_csv, canonical))
+        return len(self._fingerprints)
+
+    def merge(self, keys, source_csv, source_sizes, canonical=None):
+        """
+        Add the keys this run appended to source_csv (source_sizes: size of source_csv before / after the append or compaction)
+        The index file is reloaded first: if it does not end where this write started (another run's urls are not in it), it is rebuilt
+        Returns False if it was rebuilt
+        """
+        size_before, size_after = source_sizes
+        with self._lock:
+            self.load()
+            if self._source_size != size_before:
+                self.write(*self.get_csv_fingerprints(source_csv, canonical))
+                return False
+            fingerprints = np.array([self.fingerprint(key) for key in keys], dtype='<u8')
+            self.write(np.concatenate([np.asarray(self._fingerprints), fingerprints]), size_after)
+        return True
+
+    def write(self, fingerprints, source_size):
+        """
+        Write the index of a csv of source_size bytes (lock held)
+        """
+        fingerprints = np.unique(fingerprints).astype('<u8')
+        # atomic: runs mapping the former file keep reading it
+        tmp = self._index_file + '.' + str(os.getpid()) + '.tmp'
+        with open(tmp, 'wb') as f:
+            f.write(MAGIC + source_size.to_bytes(8, 'little'))
+            fingerprints.tofile(f)
+        os.replace(tmp, self._index_file)
+        self.load()
+
+    def __len__(self):
+        return len(self._fingerprints)
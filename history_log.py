@@ -0,0 +1,124 @@
+'''
+# Processed urls history (processed_*.csv): append-only log, compacted when it holds too many duplicates
+'''
+import csv
+import os
+
+from file_lock import FileLockClass
+
+
+__all__ = ("HistoryLogClass",)
+
+class HistoryLogClass:
+    def __init__(self,
+            *,
+            csv_file: str,
+            canonical = None, # key of an url when deduplicating (e.g. ProcessedUrlIndexClass.canonical), stripped url by default
+            compaction_ratio: float = 0.5, # duplicate rows / rows above which compact_if_needed rewrites the file (0 = never)
+        ):
+        self._csv_file = csv_file
+        self._canonical = canonical
+        self._compaction_ratio = compaction_ratio
+        # unknown until the file is loaded
+        self._rows = None
+        self._unique = None
+        # (size before, size after) of the last append / compaction
+        self._last_sizes = None
+        # appends and compactions of every run go through it
+        self._lock = FileLockClass(lock_file=csv_file + '.lock')
+
+    def get_size(self):
+        return os.path.getsize(self._csv_file) if os.path.isfile(self._csv_file) else 0
+
+    def get_last_sizes(self):
+        """
+        Returns (size before, size after) of the file around the last append / compaction of this run
+        """
+        return self._last_sizes
+
+    def get_key(self, url):
+        return self._canonical(url) if self._canonical else url.strip()
+
+    def read(self):
+        """
+        Yields the urls of the file (one per row, any extra column is read too)
+        """
+        if not os.path.isfile(self._csv_file):
+            return
+        with open(self._csv_file) as f:
+            for row in csv.reader(f, delimiter=','):
+                for url in row:
+                    # "0": header written by the former save_csv
+                    if url and url != '0':
+                        yield url
+
+    def load(self):
+        """
+        Returns the urls of the file and counts its duplicates (raw urls, no canonical key: this runs at startup)
+        """
+        urls = list(self.read())
+        self._rows = len(urls)
+        self._unique = len(set(urls))
+        return urls
+
+    def append(self, urls):
+        """
+        Append the urls of the current run (the history itself is never written back)
+        """
+        urls = [url for url in dict.fromkeys(urls) if url]
+        with self._lock:
+            size = self.get_size()
+            if urls:
+                with open(self._csv_file, 'a', newline='') as f:
+                    writer = csv.writer(f, quoting=csv.QUOTE_ALL, lineterminator='\n')
+                    for url in urls:
+                        writer.writerow([url])
+            self._last_sizes = (size, self.get_size())
+        if self._rows is not None:
+            self._rows += len(urls)
+            self._unique += len(urls)
+        return len(urls)
+
+    def get_duplicate_ratio(self):
+        """
+        Returns duplicate rows / rows, None if the file was not loaded
+        """
+        if self._rows is None:
+            return None
+        return 1 - self._unique / self._rows if self._rows else 0
+
+    def should_compact(self):
+        ratio = self.get_duplicate_ratio()
+        return bool(self._compaction_ratio) and ratio is not None and ratio > self._compaction_ratio
+
+    def compact(self):
+        """
+        Rewrite the file deduplicated and sorted, returns (rows before, rows after)
+        """
+        # locked: urls appended by another run between the read and the replace would be lost
+        with self._lock:
+            size = self.get_size()
+            keys = {}
+            rows = 0
+            for url in self.read():
+                rows += 1
+                keys[self.get_key(url)] = True
+            keys = sorted(keys)
+            # atomic: a crash mid-write leaves the former file untouched
+            tmp = self._csv_file + '.' + str(os.getpid()) + '.tmp'
+            with open(tmp, 'w', newline='') as f:
+                writer = csv.writer(f, quoting=csv.QUOTE_ALL, lineterminator='\n')
+                for key in keys:
+                    writer.writerow([key])
+            os.replace(tmp, self._csv_file)
+            self._last_sizes = (size, self.get_size())
+        self._rows = self._unique = len(keys)
+        return rows, len(keys)
+
+    def compact_if_needed(self):
+        """
+        Compact the file if its duplicate ratio passed the threshold, returns (rows before, rows after) or None
+        """
+        if not self.should_compact():
+            return None
+        return self.compact()
@@ -0,0 +1,169 @@
+'''
+# On-disk HTTP cache for listing pages (conditional revalidation)
+'''
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+
+
+__all__ = ("HttpCacheClass",)
+
+class HttpCacheClass:
+    def __init__(self,
+            *,
+            cache_dir: str,
+            max_size_mb: float = 200, # evict least recently used entries above this size
+        ):
+        self._cache_dir = cache_dir
+        self._max_size = int(max_size_mb * 1024 * 1024)
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'stores': 0, 'evictions': 0}
+
+        os.makedirs(cache_dir, exist_ok=True)
+        self._size = sum(self.get_entry_size(key) for key in self.get_keys())
+
+    def get_key(self, url):
+        return hashlib.sha1(url.encode('utf-8')).hexdigest()
+
+    def get_paths(self, key):
+        base = os.path.join(self._cache_dir, key)
+        return base + '.json', base + '.html.gz'
+
+    def get_keys(self):
+        return [f[:-len('.json')] for f in os.listdir(self._cache_dir) if f.endswith('.json')]
+
+    def get_entry_size(self, key):
+        size = 0
+        for path in self.get_paths(key):
+            if os.path.isfile(path):
+                size += os.path.getsize(path)
+        return size
+
+    def get(self, url):
+        """
+        Returns the cached entry of url (meta dict) or None
+        """
+        meta_path, body_path = self.get_paths(self.get_key(url))
+        try:
+            with open(meta_path, encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if entry.get('url') != url:
+            return None
+        return entry
+
+    def get_conditional_headers(self, entry):
+        headers = {}
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def get_body(self, entry):
+        meta_path, body_path = self.get_paths(self.get_key(entry['url']))
+        try:
+            with gzip.open(body_path, 'rt', encoding='utf-8') as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def get_articles(self, entry, signature):
+        """
+        Returns the articles parsed from the cached body (None if parsed with another model)
+        """
+        if entry.get('signature') != signature:
+            return None
+        return entry.get('articles')
+
+    def hit(self, entry):
+        """
+        Cached page is still valid (304): refresh its last use
+        """
+        with self._lock:
+            self.stats['hits'] += 1
+        meta_path, body_path = self.get_paths(self.get_key(entry['url']))
+        try:
+            os.utime(meta_path)
+        except OSError:
+            pass
+
+    def miss(self):
+        with self._lock:
+            self.stats['misses'] += 1
+
+    def store(self, url, response, body, signature, articles):
+        """
+        Store body + validators of response with the articles parsed from it
+        """
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+        if not etag and not last_modified:
+            # can't be revalidated
+            return False
+
+        key = self.get_key(url)
+        meta_path, body_path = self.get_paths(key)
+        entry = {
+            'url': url,
+            'etag': etag,
+            'last_modified': last_modified,
+            'signature': signature,
+            'articles': articles,
+            'stored_at': int(time.time()),
+        }
+        with self._lock:
+            previous_size = self.get_entry_size(key)
+            with gzip.open(body_path, 'wt', encoding='utf-8') as f:
+                f.write(body)
+            with open(meta_path, 'w', encoding='utf-8') as f:
+                json.dump(entry, f)
+            self._size += self.get_entry_size(key) - previous_size
+            self.stats['stores'] += 1
+            if self._size > self._max_size:
+                self.evict()
+        return True
+
+    def update_articles(self, entry, signature, articles):
+        """
+        Replace the articles of a still valid entry, re-parsed from its body with another model (meta only)
+        """
+        key = self.get_key(entry['url'])
+        meta_path, body_path = self.get_paths(key)
+        entry = dict(entry, signature=signature, articles=articles)
+        with self._lock:
+            previous_size = self.get_entry_size(key)
+            with open(meta_path, 'w', encoding='utf-8') as f:
+                json.dump(entry, f)
+            self._size += self.get_entry_size(key) - previous_size
+            self.stats['stores'] += 1
+        return True
+
+    def evict(self):
+        """
+        Remove least recently used entries until the cache fits max_size_mb (lock held)
+        """
+        entries = []
+        for key in self.get_keys():
+            meta_path, body_path = self.get_paths(key)
+            try:
+                entries.append((os.path.getmtime(meta_path), key))
+            except OSError:
+                pass
+        entries.sort()
+
+        for last_used, key in entries:
+            if self._size <= self._max_size:
+                break
+            size = self.get_entry_size(key)
+            for path in self.get_paths(key):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            self._size -= size
+            self.stats['evictions'] += 1
@@ -0,0 +1,117 @@
+'''
+# Per host latency histograms used to tune request timeouts
+'''
+import json
+import os
+import threading
+
+
+__all__ = ("LatencyTrackerClass",)
+
+# bucket upper bounds (seconds): 0.05s ... ~125s, +25% each
+BUCKETS = [round(0.05 * 1.25 ** i, 3) for i in range(36)]
+
+class LatencyTrackerClass:
+    def __init__(self,
+            *,
+            histograms_json: str = '', # persisted histograms ('' to keep them in memory only)
+            factor: float = 3, # timeout = p99 * factor
+            min_samples: int = 5, # samples needed before tuning a host
+            connect_bounds: tuple = (3, 15), # connect timeout floor / ceiling (seconds)
+            read_bounds: tuple = (5, 60), # read timeout floor / ceiling (seconds)
+            default_timeout: tuple = (30, 30), # (connect, read) of hosts without enough samples
+            max_samples: int = 2000, # older samples are halved above this count (per host)
+        ):
+        self._histograms_json = histograms_json
+        self._factor = factor
+        self._min_samples = min_samples
+        self._connect_bounds = connect_bounds
+        self._read_bounds = read_bounds
+        self._default_timeout = default_timeout
+        self._max_samples = max_samples
+        self._lock = threading.Lock()
+        self._histograms = {}
+
+        if histograms_json and os.path.isfile(histograms_json):
+            try:
+                with open(histograms_json, encoding='utf-8') as f:
+                    self._histograms = json.load(f)
+            except (OSError, ValueError):
+                print('Cant load latency histograms (' + str(histograms_json) + ')')
+
+    def get_bucket(self, seconds):
+        for i, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                return str(i)
+        return str(len(BUCKETS) - 1)
+
+    def record(self, host, seconds):
+        """
+        Add an observed latency (a timed out request counts as its timeout)
+        """
+        bucket = self.get_bucket(seconds)
+        with self._lock:
+            histogram = self._histograms.setdefault(host, {})
+            histogram[bucket] = histogram.get(bucket, 0) + 1
+
+    def get_percentile(self, host, percentile=0.99):
+        histogram = self._histograms.get(host)
+        if not histogram:
+            return None
+        total = sum(histogram.values())
+        if total < self._min_samples:
+            return None
+        count = 0
+        for i in sorted(histogram, key=int):
+            count += histogram[i]
+            if count >= percentile * total:
+                return BUCKETS[int(i)]
+        return BUCKETS[-1]
+
+    def get_timeout(self, host):
+        """
+        Returns (connect, read) timeouts of host: p99 * factor within floor / ceiling bounds
+        """
+        with self._lock:
+            p99 = self.get_percentile(host)
+        if p99 is None:
+            return self._default_timeout
+        timeout = p99 * self._factor
+        connect = min(max(timeout, self._connect_bounds[0]), self._connect_bounds[1])
+        read = min(max(timeout, self._read_bounds[0]), self._read_bounds[1])
+        return (connect, read)
+
+    def get_histograms(self):
+        with self._lock:
+            return {host: dict(histogram) for host, histogram in self._histograms.items()}
+
+    def merge(self, histograms):
+        """
+        Add histograms recorded by another process
+        """
+        with self._lock:
+            for host, histogram in histograms.items():
+                mine = self._histograms.setdefault(host, {})
+                for bucket, count in histogram.items():
+                    mine[bucket] = mine.get(bucket, 0) + count
+
+    def get_tuned_hosts(self):
+        with self._lock:
+            return [host for host in self._histograms if self.get_percentile(host) is not None]
+
+    def save(self):
+        if not self._histograms_json:
+            return False
+        with self._lock:
+            # keep recent latencies weighting more than old runs
+            for host, histogram in self._histograms.items():
+                while sum(histogram.values()) > self._max_samples:
+                    for bucket in list(histogram):
+                        histogram[bucket] = histogram[bucket] // 2
+                        if not histogram[bucket]:
+                            del histogram[bucket]
+            tmp = self._histograms_json + '.tmp'
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(self._histograms, f)
+            os.replace(tmp, self._histograms_json)
+        return True
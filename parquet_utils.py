@@ -0,0 +1,119 @@
+'''
+# Parquet copy of the posts-*.csv exports (typed columns, read by column)
+'''
+import math
+import os
+
+import pandas as pd
+
+
+__all__ = ("PostsParquetClass",)
+
+# '%Y-%m-%d %H:%M:%S' strings in the csv exports
+TIMESTAMP_COLUMNS = ('published_at', 'extracted_at', 'deadline')
+# the only format parsed (what save_new_items writes), anything else is kept as text
+TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'
+# few distinct values per file
+DICTIONARY_COLUMNS = ('langs', 'rubrique_website', 'themes')
+
+class PostsParquetClass:
+    def __init__(self,
+            *,
+            compression: str = 'zstd', # parquet codec of every column
+        ):
+        self._compression = compression
+
+    def get_pyarrow(self):
+        """
+        Returns (pyarrow, pyarrow.parquet), imported on first use: csv-only runs do not need pyarrow
+        """
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError as e:
+            raise ImportError('pyarrow is required for the parquet output (pip install pyarrow)') from e
+        return pyarrow, pyarrow.parquet
+
+    def get_text(self, value):
+        # NaN / None / False (unset model fields) are empty cells in the csv exports
+        if value is None or value is False or (isinstance(value, float) and math.isnan(value)):
+            return None
+        return str(value)
+
+    def get_table(self, posts):
+        """
+        Returns posts (DataFrame, csv export columns) as a typed arrow table:
+        timestamps (naive) for TIMESTAMP_COLUMNS, dictionary strings for DICTIONARY_COLUMNS, strings otherwise
+        Timestamp values not written as TIMESTAMP_FORMAT (e.g. a deadline left as text, a day-first date, an offset)
+        are not guessed: they are kept as is in a <column>_raw string column
+        """
+        pa, pq = self.get_pyarrow()
+        columns = {}
+        fields = []
+        for column in posts.columns:
+            values = [self.get_text(value) for value in posts[column]]
+            if column in TIMESTAMP_COLUMNS:
+                values = pd.Series(values, dtype=object)
+                dates = pd.to_datetime(values, errors='coerce', format=TIMESTAMP_FORMAT, exact=True)
+                # strptime also accepts unpadded fields ('2025-3-5 8:00:00'): only values written back identically are typed
+                typed = dates.dt.strftime(TIMESTAMP_FORMAT) == values
+                dates = dates.where(typed)
+                columns[column] = pa.array(dates, type=pa.timestamp('us'), from_pandas=True)
+                fields.append(pa.field(column, pa.timestamp('us')))
+                raw = [value if value and not is_typed else None for value, is_typed in zip(values, typed)]
+                if any(raw):
+                    columns[column + '_raw'] = pa.array(raw, type=pa.string())
+                    fields.append(pa.field(column + '_raw', pa.string()))
+            elif column in DICTIONARY_COLUMNS:
+                columns[column] = pa.array(values, type=pa.string()).dictionary_encode()
+                fields.append(pa.field(column, pa.dictionary(pa.int32(), pa.string())))
+            else:
+                columns[column] = pa.array(values, type=pa.string())
+                fields.append(pa.field(column, pa.string()))
+        return pa.Table.from_pydict(columns, schema=pa.schema(fields))
+
+    def write(self, posts, parquet_file):
+        """
+        Write posts to parquet_file (atomic: readers never see a partial file)
+        """
+        pa, pq = self.get_pyarrow()
+        table = self.get_table(posts)
+        tmp = parquet_file + '.' + str(os.getpid()) + '.tmp'
+        pq.write_table(table, tmp, compression=self._compression)
+        os.replace(tmp, parquet_file)
+        return table.num_rows
+
+    def read(self, parquet_file, columns=None, as_text=False):
+        """
+        Returns the posts of parquet_file (only columns if given)
+        as_text: read like the csv exports by load_all_posts (text columns, '%Y-%m-%d %H:%M:%S' timestamps, raw text restored, '' for empty cells)
+        """
+        pa, pq = self.get_pyarrow()
+        if columns is not None and as_text:
+            # the raw text of unparsed timestamps is needed to restore them
+            names = pq.read_schema(parquet_file).names
+            columns = list(columns) + [column + '_raw' for column in columns if column + '_raw' in names]
+        posts = pq.read_table(parquet_file, columns=columns).to_pandas()
+        if not as_text:
+            return posts
+        for column in list(posts.columns):
+            if column.endswith('_raw'):
+                continue
+            if column in TIMESTAMP_COLUMNS:
+                text = posts[column].dt.strftime('%Y-%m-%d %H:%M:%S').astype(object)
+                if column + '_raw' in posts.columns:
+                    text = text.where(posts[column + '_raw'].isna(), posts[column + '_raw'].astype(object))
+                posts[column] = text.where(text.notna(), '')
+            elif isinstance(posts[column].dtype, pd.CategoricalDtype):
+                posts[column] = posts[column].astype(object).where(posts[column].notna(), '')
+            else:
+                # string columns stay as read (no python str per cell)
+                posts[column] = posts[column].fillna('')
+        return posts.drop(columns=[column for column in posts.columns if column.endswith('_raw')])
+
+    def count(self, parquet_file):
+        """
+        Returns the number of posts of parquet_file (footer only)
+        """
+        pa, pq = self.get_pyarrow()
+        return pq.ParquetFile(parquet_file).metadata.num_rows
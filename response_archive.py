@@ -0,0 +1,99 @@
+'''
+# Raw response archive (record listing / detail responses, replay them offline)
+'''
+import gzip
+import hashlib
+import json
+import os
+import threading
+from urllib.parse import urlparse
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+
+__all__ = ("ResponseArchiveClass", "ArchiveMissError")
+
+class ArchiveMissError(requests.exceptions.ConnectionError):
+    """
+    Raised while replaying a request that was never recorded
+    """
+
+
+class ResponseArchiveClass:
+    def __init__(self,
+            *,
+            archive_dir: str,
+            mode: str = 'record', # record / replay
+        ):
+        if not mode in ('record', 'replay'):
+            raise ValueError('Unknown archive mode: ' + str(mode))
+        self._archive_dir = archive_dir
+        self._mode = mode
+        self._lock = threading.Lock()
+        self.stats = {'recorded': 0, 'replayed': 0, 'missing': 0}
+        os.makedirs(archive_dir, exist_ok=True)
+
+    def is_replaying(self):
+        return self._mode == 'replay'
+
+    def get_key(self, method, url, data=None):
+        if isinstance(data, dict):
+            data = json.dumps(data, sort_keys=True, default=str)
+        return hashlib.sha1((method.upper() + ' ' + url + ' ' + str(data or '')).encode('utf-8')).hexdigest()
+
+    def get_path(self, url, key):
+        # one folder per host: a site can be re-recorded / removed alone
+        host = urlparse(url).netloc.replace(':', '_') or '_'
+        return os.path.join(self._archive_dir, host, key + '.gz')
+
+    def record(self, method, url, response, data=None):
+        """
+        Store status, headers and raw body of response (first line: json meta, then the body)
+        """
+        if self._mode != 'record':
+            return False
+        path = self.get_path(url, self.get_key(method, url, data))
+        meta = {
+            'method': method.upper(),
+            'url': url,
+            'final_url': response.url,
+            'status': response.status_code,
+            'reason': response.reason,
+            'headers': dict(response.headers),
+        }
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = path + '.' + str(os.getpid()) + '.' + str(threading.get_ident()) + '.tmp'
+        with gzip.open(tmp, 'wb') as f:
+            f.write(json.dumps(meta).encode('utf-8') + b'\n')
+            f.write(response.content)
+        os.replace(tmp, path)
+        with self._lock:
+            self.stats['recorded'] += 1
+        return True
+
+    def replay(self, method, url, data=None):
+        """
+        Returns the recorded requests.Response of the request (ArchiveMissError if none)
+        """
+        path = self.get_path(url, self.get_key(method, url, data))
+        try:
+            with gzip.open(path, 'rb') as f:
+                meta = json.loads(f.readline().decode('utf-8'))
+                body = f.read()
+        except (OSError, ValueError):
+            with self._lock:
+                self.stats['missing'] += 1
+            raise ArchiveMissError('Not in the response archive: ' + str(method).upper() + ' ' + str(url))
+
+        response = requests.Response()
+        response.status_code = meta['status']
+        response.reason = meta['reason']
+        response.headers = CaseInsensitiveDict(meta['headers'])
+        response.url = meta['final_url']
+        response._content = body
+        # body was stored decoded
+        response.headers.pop('Content-Encoding', None)
+        with self._lock:
+            self.stats['replayed'] += 1
+        return response
@@ -0,0 +1,144 @@
+'''
+# Compiled extraction plan of a post model (CSS selectors translated to XPath once)
+'''
+import cssselect
+from lxml import etree
+from parsel import Selector, SelectorList
+from parsel.csstranslator import HTMLTranslator, css2xpath
+
+
+__all__ = ("SelectorPlanClass",)
+
+class SelectorPlanClass:
+    # model fields holding a CSS selector ('reg_list' = reg_ul + ' ' + reg_li)
+    FIELDS = (
+        'reg_list',
+        'reg_li_a',
+        'reg_li_title',
+        'reg_li_date',
+        'reg_li_image',
+        'single_title',
+        'single_content',
+        'single_image',
+        'single_date',
+        'single_tags',
+        'deadline',
+        'apply_url',
+        'eligibility_criteria',
+        'document_url',
+        'document_title',
+    )
+
+    def __init__(self,
+            *,
+            model: dict,
+        ):
+        self._batch_id = model['batch_id'] if 'batch_id' in model else ''
+        self._xpaths = {}
+        for field in self.FIELDS:
+            if field == 'reg_list':
+                css = str(model['reg_ul']) + ' ' + str(model['reg_li']) if 'reg_ul' in model and 'reg_li' in model else False
+            else:
+                css = model[field] if field in model else False
+            if self.is_selector(css):
+                self._xpaths[field] = self.compile(field, css)
+        # region listing parsing tests each element against reg_ul while the page is read
+        self._matchers = {}
+        self._match_tags = {}
+        self._match_keys = {}
+        if 'listing_parse_mode' in model and model['listing_parse_mode'] == 'region' and 'reg_ul' in model and self.is_selector(model['reg_ul']):
+            self._matchers['reg_ul'] = self.compile_match('reg_ul', model['reg_ul'])
+
+    def is_selector(self, css):
+        # empty csv cells are NaN, disabled fields False / 'FALSE'
+        if not css or not isinstance(css, str):
+            return False
+        return css.strip().upper() != 'FALSE'
+
+    def compile(self, field, css):
+        """
+        Returns the compiled XPath of css (ValueError on an invalid selector: fail at load, not mid-crawl)
+        """
+        try:
+            return etree.XPath(css2xpath(css), smart_strings=False)
+        except Exception as e:
+            raise ValueError('Invalid selector in post model ' + str(self._batch_id) + ': ' + field + ' = "' + str(css) + '" (' + str(e) + ')')
+
+    def compile_match(self, field, css):
+        """
+        Returns the compiled XPath testing if the context element itself matches css (ancestors / previous siblings only)
+        """
+        try:
+            translator = HTMLTranslator()
+            steps = []
+            tags = set()
+            keys = []
+            for parsed in cssselect.parse(css):
+                if parsed.pseudo_element:
+                    raise ValueError('pseudo elements are not supported')
+                steps.append('self::' + self.get_match_step(parsed.parsed_tree, translator))
+                tree = parsed.parsed_tree
+                while isinstance(tree, cssselect.parser.CombinedSelector):
+                    tree = tree.subselector
+                tags.add(translator.xpath(tree).element)
+                keys.append(self.get_match_key(tree))
+            # a single element name: the parser only reports these elements
+            if len(tags) == 1 and not '*' in tags:
+                self._match_tags[field] = tags.pop()
+            self._match_keys[field] = keys
+            return etree.XPath('boolean(' + ' | '.join(steps) + ')')
+        except Exception as e:
+            raise ValueError('Invalid selector in post model ' + str(self._batch_id) + ': ' + field + ' = "' + str(css) + '" (' + str(e) + ')')
+
+    def get_match_step(self, tree, translator):
+        # 'A B' -> B[ancestor::A]: the right-most compound is the element, the others are checked upwards
+        if isinstance(tree, cssselect.parser.CombinedSelector):
+            axes = {' ': 'ancestor::', '>': 'parent::', '+': 'preceding-sibling::*[1]/self::', '~': 'preceding-sibling::'}
+            return self.get_match_step(tree.subselector, translator) + '[' + axes[tree.combinator] + self.get_match_step(tree.selector, translator) + ']'
+        expression = translator.xpath(tree)
+        return expression.element + ('[' + expression.condition + ']' if expression.condition else '')
+
+    def get_match_key(self, tree):
+        # (id, classes) the element needs: checked before the XPath
+        element_id = None
+        classes = set()
+        while tree is not None and not isinstance(tree, cssselect.parser.Element):
+            if isinstance(tree, cssselect.parser.Hash):
+                element_id = tree.id
+            elif isinstance(tree, cssselect.parser.Class):
+                classes.add(tree.class_name)
+            tree = getattr(tree, 'selector', None)
+        return element_id, classes
+
+    def may_match(self, element, key):
+        element_id, classes = key
+        if element_id is not None and element.get('id') != element_id:
+            return False
+        return not classes or classes.issubset(element.get('class', '').split())
+
+    def matches(self, field, element):
+        matcher = self._matchers.get(field)
+        if matcher is None or not isinstance(element.tag, str):
+            return False
+        return any(self.may_match(element, key) for key in self._match_keys[field]) and matcher(element)
+
+    def has_matcher(self, field):
+        return field in self._matchers
+
+    def get_match_tag(self, field):
+        return self._match_tags.get(field)
+
+    def has(self, field):
+        return field in self._xpaths
+
+    def select(self, field, selector):
+        """
+        Same as selector.css(model[field]) with the precompiled XPath (empty list when the field has no selector)
+        """
+        xpath = self._xpaths.get(field)
+        if xpath is None or not hasattr(selector.root, 'tag'):
+            return SelectorList([])
+        result = xpath(selector.root)
+        if not isinstance(result, list):
+            result = [result]
+        return SelectorList([Selector(root=node, type='html') for node in result])
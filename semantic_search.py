@@ -15,12 +15,14 @@ Dependencies: `pandas`, `numpy`, `sentence-transformers` (and its Torch deps).
 # from __future__ import annotations
 
 import io
-from typing import List, Union
+from typing import List, Optional, Union
 
 import numpy as np
 import pandas as pd
 from sentence_transformers import SentenceTransformer
 
+from parquet_utils import PostsParquetClass
+
 
 class SemanticSearch:
     """Load CSVs ➜ build embeddings ➜ cosine‑similarity search."""
@@ -29,17 +31,22 @@ class SemanticSearch:
         self,
         csv_sources: List[Union[str, pd.DataFrame]],
         model_name: str = "sentence-transformers/all-MiniLM-L6-v2",
+        columns: Optional[List[str]] = None,
     ) -> None:
         """Create the search index.
 
         Parameters
         ----------
         csv_sources
-            A list containing either file *paths* to CSVs **or** pre‑loaded
-            ``pandas.DataFrame`` objects.
+            A list containing either file *paths* to CSVs (or to the
+            ``posts-*.parquet`` exports) **or** pre‑loaded ``pandas.DataFrame``
+            objects.
         model_name
             The Sentence‑Transformers model to use (defaults to the small but
             effective *all‑MiniLM‑L6‑v2*).
+        columns
+            Columns read from file sources (``None`` = all of them). Parquet
+            files only read these columns from disk.
         """
         self.model = SentenceTransformer(model_name)
 
@@ -48,8 +55,10 @@ class SemanticSearch:
         for src in csv_sources:
             if isinstance(src, pd.DataFrame):
                 dfs.append(src.copy())
+            elif isinstance(src, str) and src.endswith(".parquet"):
+                dfs.append(PostsParquetClass().read(src, columns=columns, as_text=True))
             elif isinstance(src, str):
-                dfs.append(pd.read_csv(src))
+                dfs.append(pd.read_csv(src, usecols=columns))
             else:
                 raise TypeError(
                     f"Unsupported CSV source type {type(src)}. Provide a file path or a DataFrame."
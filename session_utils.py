@@ -0,0 +1,90 @@
+'''
+# Pooled HTTP sessions (one keep-alive connection pool per host)
+'''
+import threading
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+__all__ = ("SessionManagerClass",)
+
+class CappedRetryClass(Retry):
+    """
+    Retry whose Retry-After sleeps never exceed max_retry_after seconds (a worker thread waits at most that long)
+    """
+    def __init__(self, *args, max_retry_after: float = 30, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.max_retry_after = max_retry_after
+
+    def new(self, **kw):
+        # urllib3 builds a new Retry after each attempt
+        retry = super().new(**kw)
+        retry.max_retry_after = self.max_retry_after
+        return retry
+
+    def get_retry_after(self, response):
+        retry_after = super().get_retry_after(response)
+        return min(retry_after, self.max_retry_after) if retry_after is not None else None
+
+class SessionManagerClass:
+    def __init__(self,
+            *,
+            headers: dict = None,
+            pool_size: int = 10, # max kept-alive connections per host
+            retries: int = 3, # retries on retry_statuses (connection errors / timeouts fail at once)
+            backoff_factor: float = 0.5, # sleep between retries: backoff_factor * 2^(retry - 1)
+            retry_statuses: tuple = (429, 500, 502, 503, 504),
+            max_retry_after: float = 30, # longest Retry-After sleep honoured (seconds)
+        ):
+        self._headers = headers if headers else {}
+        self._pool_size = max(1, int(pool_size))
+        self._retries = max(0, int(retries))
+        self._backoff_factor = backoff_factor
+        self._retry_statuses = retry_statuses
+        self._max_retry_after = max_retry_after
+        self._sessions = {}
+        self._lock = threading.Lock()
+
+    def get_host(self, url):
+        return urlparse(url).netloc
+
+    def get_session(self, url):
+        """
+        Returns the session of url's host (created on first use)
+        """
+        host = self.get_host(url)
+        with self._lock:
+            if not host in self._sessions:
+                self._sessions[host] = self.new_session()
+            return self._sessions[host]
+
+    def new_session(self):
+        retry = CappedRetryClass(
+            total=self._retries,
+            # a dead / slow host should not wait several full timeouts (the circuit breaker counts one failure per request)
+            connect=0,
+            read=0,
+            backoff_factor=self._backoff_factor,
+            status_forcelist=self._retry_statuses,
+            respect_retry_after_header=True,
+            max_retry_after=self._max_retry_after,
+            raise_on_status=False, # give back the last response, callers check the status
+        )
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self._pool_size, max_retries=retry)
+        session = requests.Session()
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        session.headers.update(self._headers)
+        return session
+
+    def get_hosts(self):
+        return list(self._sessions.keys())
+
+    def close(self):
+        with self._lock:
+            for session in self._sessions.values():
+                session.close()
+            self._sessions = {}
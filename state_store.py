@@ -0,0 +1,97 @@
+'''
+# SQLite crawl state (processed post / image / publication urls), shared by parallel runs
+'''
+import csv
+import datetime
+import os
+import sqlite3
+import threading
+
+
+__all__ = ("StateStoreClass",)
+
+class StateStoreClass:
+    # url tables
+    TABLES = ('posts', 'images', 'publications')
+
+    def __init__(self,
+            *,
+            db_path: str,
+            busy_timeout: float = 30, # seconds to wait for another run's write lock
+        ):
+        self._db_path = db_path
+        self._busy_timeout = busy_timeout
+        # one connection per thread (sqlite3 connections are not shared between threads)
+        self._local = threading.local()
+        if os.path.dirname(db_path):
+            os.makedirs(os.path.dirname(db_path), exist_ok=True)
+
+        connection = self.get_connection()
+        # readers never block the writer (parallel runs / worker processes)
+        connection.execute('PRAGMA journal_mode=WAL')
+        with connection:
+            for table in self.TABLES:
+                connection.execute(
+                    'CREATE TABLE IF NOT EXISTS ' + table + '_urls ('
+                    'url TEXT PRIMARY KEY, batch_id TEXT, first_seen TEXT, last_seen TEXT'
+                    ') WITHOUT ROWID'
+                )
+
+    def get_connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self._db_path, timeout=self._busy_timeout)
+            connection.execute('PRAGMA synchronous=NORMAL')
+            self._local.connection = connection
+        return connection
+
+    def get_table(self, table):
+        if not table in self.TABLES:
+            raise ValueError('Unknown state table: ' + str(table))
+        return table + '_urls'
+
+    def contains(self, table, url):
+        """
+        True if url was processed (primary key lookup, nothing loaded in memory)
+        """
+        row = self.get_connection().execute('SELECT 1 FROM ' + self.get_table(table) + ' WHERE url = ?', (url,)).fetchone()
+        return row is not None
+
+    def add(self, table, items):
+        """
+        Record (url, batch_id) items in one transaction: new urls are inserted, known ones get a new last_seen
+        """
+        now = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        rows = [(url, batch_id or '', now, now) for url, batch_id in items if url]
+        connection = self.get_connection()
+        with connection:
+            connection.executemany(
+                'INSERT INTO ' + self.get_table(table) + ' (url, batch_id, first_seen, last_seen) VALUES (?, ?, ?, ?) '
+                'ON CONFLICT(url) DO UPDATE SET last_seen = excluded.last_seen',
+                rows,
+            )
+        return len(rows)
+
+    def count(self, table):
+        return self.get_connection().execute('SELECT COUNT(*) FROM ' + self.get_table(table)).fetchone()[0]
+
+    def import_csv(self, table, csv_file, canonical=None):
+        """
+        Fill an empty table from its processed_*.csv file (first run with the state store)
+        """
+        if self.count(table) or not os.path.isfile(csv_file):
+            return 0
+        urls = []
+        with open(csv_file) as f:
+            for row in csv.reader(f, delimiter=','):
+                for url in row:
+                    # "0": header written by the former save_csv
+                    if url and url != '0':
+                        urls.append(canonical(url) if canonical else url)
+        return self.add(table, [(url, '') for url in urls])
+
+    def close(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
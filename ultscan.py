@@ -42,6 +42,9 @@ from datetime import datetime
 import pandas as pd
 import streamlit as st
 
+from parquet_utils import PostsParquetClass
+from state_store import StateStoreClass
+
 # ==========================================================
 # Global Configuration
 # ==========================================================
@@ -114,6 +117,16 @@ def get_latest_csv_file(folder: Path) -> Path | None:
     return max(csv_files, key=lambda f: f.stat().st_mtime)
 
 
+def read_posts_file(csv_file: Path) -> pd.DataFrame:
+    """
+    Read a posts export: its parquet copy when there is one (typed columns, faster), else the CSV.
+    """
+    parquet_file = csv_file.with_suffix(".parquet")
+    if parquet_file.exists():
+        return PostsParquetClass().read(str(parquet_file))
+    return pd.read_csv(csv_file)
+
+
 def load_config_summary(config_dir: Path) -> dict:
     """
     Load summary statistics from CSV files inside the config directory.
@@ -135,19 +148,32 @@ def load_config_summary(config_dir: Path) -> dict:
     except Exception as e:
         logger.warning(f"Failed to load post_models.csv: {e}")
 
+    state_path = config_dir / "state.db"
+    if state_path.exists():
+        # runs with --state-db keep the processed urls in SQLite
+        try:
+            state = StateStoreClass(db_path=str(state_path))
+            summary["posts_count"] = state.count("posts")
+            summary["images_count"] = state.count("images")
+            state.close()
+        except Exception as e:
+            logger.warning(f"Failed to load state.db: {e}")
+        return summary
+
     try:
         posts_path = config_dir / "processed_posts_urls.csv"
         if posts_path.exists():
-            df_posts = pd.read_csv(posts_path)
-            summary["posts_count"] = len(df_posts)
+            df_posts = pd.read_csv(posts_path, header=None)
+            # "0": header rows written by former runs
+            summary["posts_count"] = int((df_posts[0].astype(str) != "0").sum())
     except Exception as e:
         logger.warning(f"Failed to load processed_posts_urls.csv: {e}")
 
     try:
         images_path = config_dir / "processed_images_urls.csv"
         if images_path.exists():
-            df_images = pd.read_csv(images_path)
-            summary["images_count"] = len(df_images)
+            df_images = pd.read_csv(images_path, header=None)
+            summary["images_count"] = int((df_images[0].astype(str) != "0").sum())
     except Exception as e:
         logger.warning(f"Failed to load processed_images_urls.csv: {e}")
 
@@ -168,9 +194,13 @@ def list_csv_files(folder: Path) -> pd.DataFrame:
             created_at = datetime.fromtimestamp(stats.st_mtime).strftime("%Y-%m-%d %H:%M:%S")
             size_kb = round(stats.st_size / 1024, 2)
 
-            # count rows efficiently
+            # count rows efficiently (parquet footer when there is a copy)
             try:
-                row_count = sum(1 for _ in open(f, "r", encoding="utf-8")) - 1
+                parquet_file = f.with_suffix(".parquet")
+                if parquet_file.exists():
+                    row_count = PostsParquetClass().count(str(parquet_file))
+                else:
+                    row_count = sum(1 for _ in open(f, "r", encoding="utf-8")) - 1
                 if row_count < 0:
                     row_count = 0
             except Exception:
@@ -253,7 +283,7 @@ def home_page():
             latest_csv = get_latest_csv_file(CSV_OUTPUT_DIR)
             if latest_csv and latest_csv.exists():
                 try:
-                    df = pd.read_csv(latest_csv)
+                    df = read_posts_file(latest_csv)
                     st.dataframe(df.head())
 
                     with open(latest_csv, "rb") as f:
@@ -283,7 +313,7 @@ def latest_csv_page():
     if latest_csv and latest_csv.exists():
         try:
             st.success(f"Latest file: `{latest_csv.name}`")
-            df = pd.read_csv(latest_csv)
+            df = read_posts_file(latest_csv)
             st.dataframe(df)
 
             with open(latest_csv, "rb") as f:
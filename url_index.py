@@ -0,0 +1,60 @@
+'''
+# Processed URLs index (hashed, one canonical form for load / lookup / save)
+'''
+from urllib.parse import unquote
+
+
+__all__ = ("ProcessedUrlIndexClass",)
+
+class ProcessedUrlIndexClass:
+    def __init__(self,
+            *,
+            urls: list = None, # urls already processed (history csv)
+            store = None, # StateStoreClass holding the history instead (looked up, not loaded)
+            table: str = 'posts', # table of store
+            fingerprints = None, # FingerprintIndexClass of the history instead (memory-mapped)
+        ):
+        self._urls = set()
+        self._batches = {}
+        self._store = store
+        self._table = table
+        self._fingerprints = fingerprints
+        self.update(urls or [])
+
+    def canonical(self, url):
+        """
+        Returns the key of url: listing links are raw, post sources quoted and the history unquoted
+        mtcen.gov.tn urls are kept quoted (not valid temp urls, as saved in the history)
+        """
+        url = str(url).strip()
+        if 'mtcen.gov.tn' in url:
+            return url
+        return unquote(url)
+
+    def add(self, url, batch_id=''):
+        if url:
+            key = self.canonical(url)
+            self._urls.add(key)
+            # only urls of this run have a batch (not the history loaded at startup)
+            if batch_id:
+                self._batches[key] = batch_id
+
+    def update(self, urls):
+        for url in urls:
+            self.add(url)
+
+    def get_batch_id(self, url):
+        return self._batches.get(self.canonical(url), '')
+
+    def __contains__(self, url):
+        if not url:
+            return False
+        key = self.canonical(url)
+        if key in self._urls:
+            return True
+        if self._store is not None and self._store.contains(self._table, key):
+            return True
+        return self._fingerprints is not None and self._fingerprints.contains(key)
+
+    def __len__(self):
+        return len(self._urls)